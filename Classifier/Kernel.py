@@ -1,31 +1,285 @@
-from numpy import exp, inner, sqrt, subtract
+from numpy import abs as absolute, array, cos, empty, exp, inner, maximum, ones, pi, sqrt, subtract
 from numpy.linalg import norm
+from numpy.random import default_rng
+
+
+def _squared_distances(X, Y):
+    """
+    Compute all the squared euclidean distances between the rows of X and the rows of Y with a single product
+    :param X: array of features vectors
+    :param Y: array of features vectors
+    :return: array of shape (len(X), len(Y)) of the squared distances
+    """
+    distances = (X ** 2).sum(axis=1)[:, None] + (Y ** 2).sum(axis=1)[None, :] - 2 * X.dot(Y.T)
+    return maximum(distances, 0)
+
+
+class RandomFourierFeatures(object):
+
+    def __init__(self, frequencies, offsets):
+        """
+        Random feature map z such that z(x).z(y) approximates kernel(x, y) : z(x) = sqrt(2 / D) cos(W x + b)
+        :param frequencies: array W of shape (D, size of the features vectors)
+        :param offsets: array b of D offsets
+        """
+        self.frequencies = frequencies
+        self.offsets = offsets
+
+    def transform(self, features):
+        """
+        Map features vectors to the random feature space
+        :param features: array of features vectors
+        :return: array of shape (len(features), D)
+        """
+        return sqrt(2 / len(self.offsets)) * cos(features.dot(self.frequencies.T) + self.offsets)
+
+
+def _exponential_random_features(scale, n_features, dimension, seed):
+    """
+    Draw the random Fourier features of the kernel exp(-||x - y|| / scale), whose Fourier transform is a multivariate
+    Cauchy distribution of scale 1 / scale
+    :param scale: distance at which the kernel is exp(-1)
+    :param n_features: size of the features vectors
+    :param dimension: number D of random features
+    :param seed: seed of the random generator (None for a random one)
+    :return: RandomFourierFeatures
+    """
+    generator = default_rng(seed)
+    frequencies = generator.standard_normal((dimension, n_features))
+    frequencies /= scale * absolute(generator.standard_normal((dimension, 1)))
+    return RandomFourierFeatures(frequencies, generator.uniform(0, 2 * pi, dimension))
+
+
+class BaseKernel(object):
+    name = None
+
+    def __init__(self, **parameters):
+        self.parameters = parameters
+
+    def __call__(self, x, y):
+        """
+        Evaluate the kernel for a single pair of vectors
+        :param x: features vector
+        :param y: features vector
+        :return: float
+        """
+        raise NotImplementedError
+
+    def matrix(self, X, Y):
+        """
+        Evaluate the kernel for every pair of rows of X and Y at once
+        :param X: array of features vectors
+        :param Y: array of features vectors
+        :return: array of shape (len(X), len(Y)) where the element [i, j] is kernel(X[i], Y[j])
+        """
+        raise NotImplementedError
+
+    def from_pairwise(self, inner_products, squared_distances):
+        """
+        Evaluate the kernel from the inner products and squared distances already computed between the vectors, so
+        that several kernels can share the same pairwise computation
+        :param inner_products: array of the inner products <X[i], Y[j]>
+        :param squared_distances: array of the squared distances ||X[i] - Y[j]||^2
+        :return: array of the same shape where the element [i, j] is kernel(X[i], Y[j])
+        """
+        raise NotImplementedError
+
+    def from_inner_products(self, inner_products):
+        """
+        Evaluate the Gram matrix of a set of vectors from their inner products only, the squared distances are derived
+        from them (and the diagonal) when the kernel needs them
+        :param inner_products: square array of the inner products <X[i], X[j]>
+        :return: array of the same shape where the element [i, j] is kernel(X[i], X[j])
+        """
+        return self.from_pairwise(inner_products, squared_distances_from_inner_products(inner_products))
+
+    def diagonal(self, X):
+        """
+        Evaluate the kernel of every row of X with itself
+        :param X: array of features vectors
+        :return: array of len(X) values kernel(X[i], X[i])
+        """
+        return array([self(x, x) for x in X])
+
+    def random_features(self, n_features, dimension=500, seed=None):
+        """
+        Random Fourier feature map approximating the kernel (shift-invariant kernels only)
+        :param n_features: size of the features vectors
+        :param dimension: number of random features, the larger the closer to the kernel (and the slower)
+        :param seed: seed of the random generator (None for a random one)
+        :return: RandomFourierFeatures
+        """
+        raise NotImplementedError("No random Fourier features for the {} kernel".format(self.name))
+
+    def __repr__(self):
+        return "{}({})".format(self.name, ", ".join("{}={}".format(key, value)
+                                                    for key, value in self.parameters.items()))
+
+
+class LinearKernel(BaseKernel):
+    name = "linear"
+
+    def __init__(self):
+        super().__init__()
+
+    def __call__(self, x, y):
+        return inner(x, y)
+
+    def matrix(self, X, Y):
+        return X.dot(Y.T)
+
+    def from_pairwise(self, inner_products, squared_distances):
+        return inner_products
+
+    def from_inner_products(self, inner_products):
+        return inner_products
+
+    def diagonal(self, X):
+        return (X ** 2).sum(axis=1)
+
+
+class GaussianKernel(BaseKernel):
+    name = "gaussian"
+
+    def __init__(self, sigma=5.0):
+        super().__init__(sigma=sigma)
+        self.sigma = sigma
+
+    def __call__(self, x, y):
+        return exp(-sqrt(norm(x - y) ** 2 / (2 * self.sigma ** 2)))
+
+    def matrix(self, X, Y):
+        return exp(-sqrt(_squared_distances(X, Y) / (2 * self.sigma ** 2)))
+
+    def from_pairwise(self, inner_products, squared_distances):
+        return exp(-sqrt(squared_distances / (2 * self.sigma ** 2)))
+
+    def diagonal(self, X):
+        return ones(len(X))
+
+    def random_features(self, n_features, dimension=500, seed=None):
+        return _exponential_random_features(self.sigma * sqrt(2), n_features, dimension, seed)
+
+
+class PolyKernel(BaseKernel):
+    name = "poly_kernel"
+
+    def __init__(self, dimension=3, offset=1.0):
+        super().__init__(dimension=dimension, offset=offset)
+        self.dimension = dimension
+        self.offset = offset
+
+    def __call__(self, x, y):
+        return (self.offset + inner(x, y)) ** self.dimension
+
+    def matrix(self, X, Y):
+        return (self.offset + X.dot(Y.T)) ** self.dimension
+
+    def from_pairwise(self, inner_products, squared_distances):
+        return (self.offset + inner_products) ** self.dimension
+
+    def from_inner_products(self, inner_products):
+        return self.from_pairwise(inner_products, None)
+
+    def diagonal(self, X):
+        return (self.offset + (X ** 2).sum(axis=1)) ** self.dimension
+
+
+class RadialBasisKernel(BaseKernel):
+    name = "radial_basis"
+
+    def __init__(self, gamma=10):
+        super().__init__(gamma=gamma)
+        self.gamma = gamma
+
+    def __call__(self, x, y):
+        return exp(-self.gamma * norm(subtract(x, y)))
+
+    def matrix(self, X, Y):
+        return exp(-self.gamma * sqrt(_squared_distances(X, Y)))
+
+    def from_pairwise(self, inner_products, squared_distances):
+        return exp(-self.gamma * sqrt(squared_distances))
+
+    def diagonal(self, X):
+        return ones(len(X))
+
+    def random_features(self, n_features, dimension=500, seed=None):
+        return _exponential_random_features(1 / self.gamma, n_features, dimension, seed)
 
 
 class Kernel(object):
     @staticmethod
     def linear():
-        return lambda x, y: inner(x, y)
+        return LinearKernel()
 
     @staticmethod
     def gaussian(sigma=5.0):
-        return lambda x, y: exp(-sqrt(norm(x - y) ** 2 / (2 * sigma ** 2)))
+        return GaussianKernel(sigma)
 
     @staticmethod
     def poly_kernel(dimension=3, offset=1.0):
-        return lambda x, y: (offset + inner(x, y)) ** dimension
+        return PolyKernel(dimension, offset)
 
     @staticmethod
     def radial_basis(gamma=10):
-        return lambda x, y: exp(-gamma * norm(subtract(x, y)))
+        return RadialBasisKernel(gamma)
 
     @staticmethod
-    def get_correct_kernel(name):
+    def get_correct_kernel(name, parameters=None):
+        if parameters is None:
+            parameters = dict()
         if name == "linear":
             return Kernel.linear()
         elif name == "poly_kernel":
-            return Kernel.poly_kernel()
+            return Kernel.poly_kernel(**parameters)
         elif name == "gaussian":
-            return Kernel.gaussian()
+            return Kernel.gaussian(**parameters)
         elif name == "radial_basis":
-            return Kernel.radial_basis()
+            return Kernel.radial_basis(**parameters)
+
+
+def gram_matrix(kernel, features, block_size=1024):
+    """
+    Compute the (symmetric) Gram matrix of the features. Only the upper half is evaluated, block of rows by block of
+    rows, and then mirrored to the lower half.
+    :param kernel: kernel object returned by one of the Kernel static methods
+    :param features: array of features vectors
+    :param block_size: number of rows evaluated at once
+    :return: array of shape (len(features), len(features))
+    """
+    features = features.astype(float)
+    n_samples = len(features)
+    K = empty((n_samples, n_samples))
+    for start in range(0, n_samples, block_size):
+        end = min(start + block_size, n_samples)
+        block = kernel.matrix(features[start:end], features[start:])
+        K[start:end, start:] = block
+        K[start:, start:end] = block.T
+    return K
+
+
+def pairwise_products(features):
+    """
+    Compute once the inner products and the squared distances between all the features vectors, from which the
+    Gram matrix of every kernel can be derived (see BaseKernel.from_pairwise)
+    :param features: array of features vectors
+    :return: tuple of two arrays of shape (len(features), len(features)) : inner products and squared distances
+    """
+    features = features.astype(float)
+    inner_products = features.dot(features.T)
+    return inner_products, squared_distances_from_inner_products(inner_products)
+
+
+def squared_distances_from_inner_products(inner_products):
+    """
+    Derive the squared distances between vectors from their inner products : ||x - y||^2 = <x, x> + <y, y> - 2 <x, y>
+    :param inner_products: square array of the inner products <X[i], X[j]>
+    :return: array of the same shape of the squared distances ||X[i] - X[j]||^2
+    """
+    norms = inner_products.diagonal()
+    squared_distances = norms[:, None] + norms[None, :]
+    # in place, no other temporary array of the same size
+    squared_distances -= inner_products
+    squared_distances -= inner_products
+    return maximum(squared_distances, 0, out=squared_distances)
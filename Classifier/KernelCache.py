@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+
+class KernelCache(object):
+
+    def __init__(self, kernel, features, cache_size=100):
+        """
+        Cache of the rows of the Gram matrix, computed on demand and evicted in least recently used order
+        :param kernel: kernel object returned by one of the Kernel static methods
+        :param features: array of features vectors
+        :param cache_size: memory budget of the cache in MB, at least two rows are always kept
+        """
+        self.kernel = kernel
+        self.features = features.astype(float)
+        self.cache_size = cache_size
+        row_size = len(self.features) * self.features.itemsize
+        self.capacity = max(2, int(cache_size * 1024 * 1024 // max(row_size, 1)))
+        self.rows = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_row(self, i):
+        """
+        Return the row i of the Gram matrix, from the cache if it is there
+        :param i: index of the features vector
+        :return: array of kernel(features[i], features[t]) for every t
+        """
+        row = self.rows.get(i)
+        if row is not None:
+            self.hits += 1
+            self.rows.move_to_end(i)
+            return row
+
+        self.misses += 1
+        row = self.kernel.matrix(self.features[i:i + 1], self.features)[0]
+        self.rows[i] = row
+        if len(self.rows) > self.capacity:
+            self.rows.popitem(last=False)
+            self.evictions += 1
+        return row
+
+    def clear(self):
+        """
+        Empty the cache and reset the counters
+        :return:
+        """
+        self.rows.clear()
+        self.hits, self.misses, self.evictions = 0, 0, 0
+
+    def statistics(self):
+        """
+        Counters of the use of the cache
+        :return: dictionary containing the hits, misses, evictions, hit rate and the number of rows cached
+        """
+        requests = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / requests if requests else 0.0, "rows": len(self.rows),
+                "capacity": self.capacity}
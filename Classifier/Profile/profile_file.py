@@ -1,5 +1,12 @@
+from json import dumps, loads
 from os.path import dirname
 
+from numpy import ascontiguousarray, dtype, empty, memmap
+
+BINARY_EXTENSION = ".svm"
+_MAGIC = b"SVMPROF1"
+_ALIGNMENT = 64
+
 
 def get_path_profile(name_resource):
     """
@@ -8,3 +15,84 @@ def get_path_profile(name_resource):
     :return: absolute path to the file
     """
     return dirname(__file__) + '\\' + name_resource
+
+
+def get_directory_profile():
+    """
+    Return the path of this directory
+    :return: absolute path to the directory containing the profiles
+    """
+    return dirname(__file__)
+
+
+def binary_name_file(name_file):
+    """
+    Name of the binary version of a profile
+    :param name_file: name of the profile file ('xxx.json')
+    :return: string name of the binary file ('xxx.svm')
+    """
+    return name_file.rsplit(".json", 1)[0] + BINARY_EXTENSION
+
+
+def _align(position):
+    """
+    Round up a position in the file to the next multiple of the alignment of the arrays
+    :param position: position in bytes
+    :return: aligned position in bytes
+    """
+    return (position + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def write_binary_profile(path, header, arrays):
+    """
+    Write a binary profile : a magic string, the size of the header, a JSON header (metadata and layout of the arrays)
+    and then the raw arrays, each one aligned so that it can be memory-mapped
+    :param path: path of the file to write
+    :param header: dictionary of the metadata of the profile (writable in JSON)
+    :param arrays: dictionary of the arrays of the profile (name -> array)
+    :return:
+    """
+    layout, position = dict(), 0
+    for name, value in arrays.items():
+        # offsets are relative to the beginning of the data, right after the header
+        layout[name] = {"dtype": value.dtype.str, "shape": list(value.shape), "offset": position}
+        position = _align(position + value.nbytes)
+
+    header = dict(header)
+    header["arrays"] = layout
+    encoded_header = dumps(header).encode()
+    start_data = _align(len(_MAGIC) + 8 + len(encoded_header))
+
+    with open(path, 'wb') as profile:
+        profile.write(_MAGIC)
+        profile.write(len(encoded_header).to_bytes(8, 'little'))
+        profile.write(encoded_header)
+        for name, value in arrays.items():
+            profile.seek(start_data + layout[name]["offset"])
+            profile.write(ascontiguousarray(value).tobytes())
+
+
+def read_binary_profile(path):
+    """
+    Read a binary profile written by write_binary_profile. The arrays are memory-mapped (read-only), nothing is copied
+    until they are used.
+    :param path: path of the file to read
+    :return: tuple of the header (dictionary) and the dictionary of the arrays (name -> memory-mapped array)
+    """
+    with open(path, 'rb') as profile:
+        if profile.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError("{} is not a binary profile".format(path))
+        size_header = int.from_bytes(profile.read(8), 'little')
+        header = loads(profile.read(size_header).decode())
+    start_data = _align(len(_MAGIC) + 8 + size_header)
+
+    arrays = dict()
+    for name, description in header.pop("arrays").items():
+        shape, array_type = tuple(description["shape"]), dtype(description["dtype"])
+        if 0 in shape:
+            # an empty array cannot be memory-mapped
+            arrays[name] = empty(shape, dtype=array_type)
+        else:
+            arrays[name] = memmap(path, dtype=array_type, mode='r', offset=start_data + description["offset"],
+                                  shape=shape)
+    return header, arrays
@@ -0,0 +1,102 @@
+from collections import OrderedDict
+from os.path import getmtime
+from threading import Lock, Thread
+
+from Classifier.Profile.profile_file import get_path_profile
+from Classifier.SVM import get_from_file
+
+
+def _size_classifier(classifier):
+    """
+    Estimate the memory used by a SVM classifier
+    :param classifier: SVM classifier
+    :return: number of bytes used by the arrays of the classifier
+    """
+    arrays = [classifier.weights, classifier.lagrange_multipliers, classifier.support_vectors,
+              classifier.support_vectors_labels]
+    if classifier.feature_map is not None:
+        arrays += [classifier.feature_map.frequencies, classifier.feature_map.offsets]
+    return sum(value.nbytes for value in arrays if value is not None)
+
+
+class ProfileRegistry(object):
+
+    def __init__(self, memory_budget=256):
+        """
+        Keep the profiles already loaded in memory, so that a profile is read from the disk only once (or again when
+        the file changes). The least recently used profiles are evicted when the memory budget is exceeded.
+        :param memory_budget: memory budget in MB for the loaded profiles
+        """
+        self.memory_budget = memory_budget * 1024 * 1024
+        self.profiles = OrderedDict()
+        self.memory_used = 0
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name_file):
+        """
+        Return the SVM classifier of a profile, loading it only if it is not already in the registry or if the file
+        was modified since it was loaded
+        :param name_file: name of the file of the profile
+        :return: SVM Predictor (SVM classifier ready to predict), shared by every user of the registry
+        """
+        modification_time = getmtime(get_path_profile(name_file))
+        with self.lock:
+            entry = self.profiles.get(name_file)
+            if entry is not None and entry[0] == modification_time:
+                self.hits += 1
+                self.profiles.move_to_end(name_file)
+                return entry[1]
+            self.misses += 1
+
+        # loaded outside of the lock, the other profiles stay available meanwhile
+        classifier = get_from_file(name_file)
+        self._store(name_file, modification_time, classifier)
+        return classifier
+
+    def _store(self, name_file, modification_time, classifier):
+        """
+        Add a loaded profile to the registry and evict the least recently used ones to respect the memory budget
+        :param name_file: name of the file of the profile
+        :param modification_time: modification time of the file when it was loaded
+        :param classifier: SVM classifier loaded from the file
+        :return:
+        """
+        size = _size_classifier(classifier)
+        with self.lock:
+            previous = self.profiles.pop(name_file, None)
+            if previous is not None:
+                self.memory_used -= previous[2]
+            self.profiles[name_file] = (modification_time, classifier, size)
+            self.memory_used += size
+            while self.memory_used > self.memory_budget and len(self.profiles) > 1:
+                _, (_, _, size_evicted) = self.profiles.popitem(last=False)
+                self.memory_used -= size_evicted
+
+    def preload(self, l_name_file):
+        """
+        Load some profiles in a background thread
+        :param l_name_file: list of the names of the files of the profiles to load
+        :return: the thread loading the profiles (already started)
+        """
+        def warm():
+            for name_file in l_name_file:
+                try:
+                    self.get(name_file)
+                except (OSError, ValueError):
+                    # a missing or unreadable profile will raise again when it is really needed
+                    pass
+
+        thread = Thread(target=warm, name="profile-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def statistics(self):
+        """
+        Counters of the use of the registry
+        :return: dictionary containing the hits, misses, number of profiles loaded and memory used (MB)
+        """
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "profiles": len(self.profiles),
+                    "memory_used": self.memory_used / (1024 * 1024)}
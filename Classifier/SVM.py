@@ -1,64 +1,107 @@
 from json import dumps, loads
 
-from numpy import (arange, array, diag, dot, hstack, identity, ones, outer, ravel, vstack, zeros)
+from numpy import (arange, asarray, atleast_2d, average, column_stack, diag, empty, hstack, identity, ones, outer, ravel,
+                   repeat, unique, vstack, where, zeros)
 from cvxopt import matrix
 from cvxopt.solvers import qp
 
-from Classifier.Kernel import Kernel
-from Classifier.Profile.profile_file import get_path_profile
+from Classifier.Kernel import Kernel, RandomFourierFeatures, gram_matrix
+from Classifier.KernelCache import KernelCache
+from Classifier.Profile.profile_file import (BINARY_EXTENSION, get_path_profile, read_binary_profile,
+                                             write_binary_profile)
+from Classifier.smo import smo
 
 
 class SVM(object):
 
-    def __init__(self, kernel=Kernel.linear(), C=None):
+    def __init__(self, kernel=Kernel.linear(), C=None, solver="cvxopt", cache_size=100):
         self.weights = None
+        self.feature_map = None
         self.bias = 0
         self.kernel = kernel
         self.C = C
         if self.C is not None:
             self.C = float(self.C)
+        self.solver = solver
+        self.cache_size = cache_size
+        self.cache_statistics = None
         self.performance = 0
 
-    def fit(self, features, labels, iterations=16):
+    def fit(self, features, labels, iterations=16, deduplicate=True, multiplicity=None, gram=None):
         """
         Compute the parameters of the SVM classifier regarding the features and the associated labels.
         :param features: array of features vectors
         :param labels: array of labels vectors corresponding to the features
-        :param iterations: number of iteration to solve the quadratic problem
+        :param iterations: number of iteration to solve the quadratic problem (cvxopt solver only)
+        :param deduplicate: whether to group the identical (features vector, label) pairs before solving, with a soft
+        margin (C) or the smo solver only. Each distinct pair is used once with an upper bound C scaled by its
+        multiplicity, which gives the same decision function with a much smaller quadratic problem
+        :param multiplicity:
+            (optional) number of occurrences of each features vector, when the features are already grouped. The hard
+            margin cvxopt problem has no upper bound to scale : the grouped vectors are repeated again
+            (default) computed by the grouping, or 1 for every vector
+        :param gram:
+            (optional) Gram matrix of the features already computed (for example shared between several kernels)
+            (default) computed by the solver when needed
         :return:
         """
+        features, labels = asarray(features, dtype=float), asarray(labels, dtype=float)
+        weighted = self.C is not None or self.solver == "smo"
+        if multiplicity is None and deduplicate and weighted:
+            # 0) Distinct (features vector, label) pairs and their multiplicity
+            features, labels, multiplicity = group_identical_vectors(features, labels)
+        elif multiplicity is None:
+            multiplicity = ones(len(labels))
+        elif not weighted and (asarray(multiplicity) != 1).any():
+            # 0) Every occurrence of the grouped vectors in the hard margin problem
+            occurrences = repeat(arange(len(labels)), asarray(multiplicity, dtype=int))
+            features, labels, multiplicity = features[occurrences], labels[occurrences], ones(len(occurrences))
+            if gram is not None:
+                gram = asarray(gram)[occurrences][:, occurrences]
         n_samples, n_features = features.shape
 
-        # 1) Gram matrix
-        K = zeros((n_samples, n_samples))
-        for i in range(n_samples):
-            for j in range(n_samples):
-                K[i, j] = self.kernel(features[i], features[j])
+        if self.solver == "smo":
+            # 1-3) Sequential Minimal Optimization on labels -1 | +1, the Gram matrix is never built
+            labels = where(labels > 0, 1.0, -1.0)
+            if gram is not None:
+                lagrange_multipliers, smo_bias = smo(self.kernel, features, labels, self.C, get_row=gram.__getitem__,
+                                                     sample_weight=multiplicity)
+            elif self.cache_size:
+                cache = KernelCache(self.kernel, features, self.cache_size)
+                lagrange_multipliers, smo_bias = smo(self.kernel, features, labels, self.C, get_row=cache.get_row,
+                                                     sample_weight=multiplicity)
+                self.cache_statistics = cache.statistics()
+            else:
+                lagrange_multipliers, smo_bias = smo(self.kernel, features, labels, self.C,
+                                                     sample_weight=multiplicity)
+        else:
+            # 1) Gram matrix
+            K = gram if gram is not None else gram_matrix(self.kernel, features)
 
-        P = matrix(outer(labels, labels) * K)
-        q = matrix(ones(n_samples) * -1)
-        A = matrix(labels, (1, n_samples))
-        b = matrix(0.0)
+            P = matrix(outer(labels, labels) * K)
+            q = matrix(ones(n_samples) * -1)
+            A = matrix(labels, (1, n_samples))
+            b = matrix(0.0)
 
-        if self.C is None:
-            G = matrix(diag(ones(n_samples) * -1))
-            h = matrix(zeros(n_samples))
-        else:
-            tmp1 = diag(ones(n_samples) * -1)
-            tmp2 = identity(n_samples)
-            G = matrix(vstack((tmp1, tmp2)))
-            tmp1 = zeros(n_samples)
-            tmp2 = ones(n_samples) * self.C
-            h = matrix(hstack((tmp1, tmp2)))
-
-        # 2) Resolve QP problem
-        options = dict()
-        options['maxiters'] = iterations
-        options['show_progress'] = False
-        solution = qp(P, q, G, h, A, b, options=options)['x']
-
-        # 3) Lagrange multipliers
-        lagrange_multipliers = ravel(solution)
+            if self.C is None:
+                G = matrix(diag(ones(n_samples) * -1))
+                h = matrix(zeros(n_samples))
+            else:
+                tmp1 = diag(ones(n_samples) * -1)
+                tmp2 = identity(n_samples)
+                G = matrix(vstack((tmp1, tmp2)))
+                tmp1 = zeros(n_samples)
+                tmp2 = multiplicity * self.C
+                h = matrix(hstack((tmp1, tmp2)))
+
+            # 2) Resolve QP problem
+            options = dict()
+            options['maxiters'] = iterations
+            options['show_progress'] = False
+            solution = qp(P, q, G, h, A, b, options=options)['x']
+
+            # 3) Lagrange multipliers
+            lagrange_multipliers = ravel(solution)
 
         # 4) Support vectors
         support_vectors = lagrange_multipliers > 1e-5
@@ -68,82 +111,139 @@ class SVM(object):
         self.support_vectors_labels = labels[support_vectors]
 
         # 5) Bias
-        for n in range(len(self.lagrange_multipliers)):
-            self.bias += self.support_vectors_labels[n]
-            self.bias -= sum(self.lagrange_multipliers * self.support_vectors_labels * K[ind[n], support_vectors])
-        self.bias /= len(self.lagrange_multipliers)
+        dual_coefficients = self.lagrange_multipliers * self.support_vectors_labels
+        if self.solver == "smo":
+            self.bias = smo_bias
+        else:
+            # each distinct support vector counts as many times as it appeared in the training set
+            residuals = self.support_vectors_labels - K[ind][:, support_vectors].dot(dual_coefficients)
+            self.bias = float(average(residuals, weights=multiplicity[support_vectors]))
 
-        # 6) Weight vector
-        if self.kernel == Kernel.linear():
-            self.weights = zeros(n_features)
-            for n in range(len(self.lagrange_multipliers)):
-                self.weights += self.lagrange_multipliers[n] * self.support_vectors_labels[n] * self.support_vectors[n]
+        # 6) Weight vector : a linear model collapses to its primal form, the support vectors are no longer needed
+        if self.kernel.name == "linear":
+            self.weights = dual_coefficients.dot(self.support_vectors)
+            self.lagrange_multipliers, self.support_vectors, self.support_vectors_labels = None, None, None
+
+    def _metadata(self):
+        """
+        Create a dictionary of the scalar attributes of the SVM classifier
+        :return: dictionary containing the kernel, its parameters, C, the bias and the performance
+        """
+        return {"kernel": self.kernel.name, "kernel_parameters": self.kernel.parameters, "C": self.C,
+                "bias": self.bias, "performance": self.performance}
+
+    def _arrays(self):
+        """
+        Create a dictionary of the array attributes of the SVM classifier
+        :return: dictionary containing the weights (linear model, with the random feature map for a random Fourier
+        features model) or the support vectors and their coefficients
+        """
+        if self.feature_map is not None:
+            # random Fourier features : the weight vector and the random feature map replace the support vectors
+            return {"weights": asarray(self.weights, dtype=float),
+                    "frequencies": asarray(self.feature_map.frequencies, dtype=float),
+                    "offsets": asarray(self.feature_map.offsets, dtype=float)}
+        if self.weights is not None:
+            # linear model : the weight vector replaces the support vectors
+            return {"weights": asarray(self.weights, dtype=float)}
+        return {"lagrange_multipliers": asarray(self.lagrange_multipliers, dtype=float),
+                "support_vectors": asarray(self.support_vectors, dtype=float),
+                "support_vectors_labels": asarray(self.support_vectors_labels, dtype=float)}
 
     def attributes(self):
         """
         Create a dictionary (that is writable to a file) of the different attributes of the SVM classifier
         :return: dictionary containing the different attributes of the SVM classifier
         """
-        dic_attribute = dict()
-        dic_attribute["kernel"] = str(self.kernel).split('.')[1]
-        dic_attribute["C"] = self.C
-        if self.weights:
-            dic_attribute["weights"] = self.weights.tolist()
-        else:
-            dic_attribute["weights"] = self.weights
-        dic_attribute["lagrange_multipliers"] = self.lagrange_multipliers.tolist()
-        dic_attribute["support_vectors"] = self.support_vectors.tolist()
-        dic_attribute["support_vectors_labels"] = self.support_vectors_labels.tolist()
-        dic_attribute["bias"] = self.bias
-        dic_attribute["performance"] = self.performance
+        dic_attribute = self._metadata()
+        dic_attribute["weights"] = None
+        for name, value in self._arrays().items():
+            dic_attribute[name] = value.tolist()
         return dic_attribute
 
     def save_to_file(self, name_file):
         """
         Save to a file the SVM classifier to initiate a SVMPredictor
-        :param name_file: name of the file to save all the attributes of the SVM classifier to a file
+        :param name_file: name of the file to save all the attributes of the SVM classifier to a file. A name ending
+        with '.svm' creates a binary profile (memory-mapped when loaded), otherwise a JSON profile is written
         :return:
         """
-        with open(get_path_profile(name_file), 'w') as profile:
-            profile.write(dumps(self.attributes()))
+        if name_file.endswith(BINARY_EXTENSION):
+            write_binary_profile(get_path_profile(name_file), self._metadata(), self._arrays())
+        else:
+            with open(get_path_profile(name_file), 'w') as profile:
+                profile.write(dumps(self.attributes()))
+
+    def decision_function(self, features, block_size=4096):
+        """
+        Compute the raw score of every features vector in one vectorized pass
+        :param features: array of features vectors (N x 5)
+        :param block_size: number of vectors evaluated at once against the support vectors (or mapped to the random
+        feature space), to bound the memory used
+        :return: array of N scores, the sign gives the class and the magnitude the confidence
+        """
+        features = atleast_2d(asarray(features, dtype=float))
+        if self.weights is not None and self.feature_map is None:
+            return features.dot(self.weights) + self.bias
+
+        scores = empty(len(features))
+        if self.feature_map is not None:
+            # random Fourier features : a single dot product, whatever the number of support vectors
+            for start in range(0, len(features), block_size):
+                end = start + block_size
+                scores[start:end] = self.feature_map.transform(features[start:end]).dot(self.weights)
+            return scores + self.bias
+
+        dual_coefficients = self.lagrange_multipliers * self.support_vectors_labels
+        for start in range(0, len(features), block_size):
+            end = start + block_size
+            scores[start:end] = self.kernel.matrix(features[start:end], self.support_vectors).dot(dual_coefficients)
+        return scores + self.bias
+
+    def predict_batch(self, features, range_neutral=0.25):
+        """
+        Given an array of features, predict the label of each vector
+        :param features: array of features vectors (N x 5)
+        :param range_neutral: From -range_neutral to + range_neutral, the class label will be 'Neutral'. In the
+        computation of the performance score, 'Neutral' is both considered 'Positive' and 'Negative'
+        :return: array of N labels ('Negative' 'Neutral' 'Positive')
+        """
+        scores = self.decision_function(features)
+        return where(scores < - range_neutral, "Negative", where(scores <= range_neutral, "Neutral", "Positive"))
 
     def predict(self, features, range_neutral=0.25):
         """
         Given an array of features, predict the label of each vector
-        :param range_neutral: float number use to determine the range in which the label will be 'Neutral'
         :param features: array of features vectors
         :param range_neutral: From -range_neutral to + range_neutral, the class label will be 'Neutral'. In the
         computation of the performance score, 'Neutral' is both considered 'Positive' and 'Negative'
-        :return: Corresponding labels ('Negative' 'Neutral' 'Positive')
+        :return: Corresponding label ('Negative' 'Neutral' 'Positive') for a single vector, array of labels otherwise
         """
-        if self.weights is not None:
-            result = dot(features, self.weights) + self.bias
-        else:
-            y_predict = zeros(len(features))
-            for i in range(len(features)):
-                score = 0
-                for lagrange_multipliers, support_vectors_labels, support_vectors in zip(self.lagrange_multipliers,
-                                                                                         self.support_vectors_labels,
-                                                                                         self.support_vectors):
-                    score += lagrange_multipliers * support_vectors_labels * self.kernel(features[i], support_vectors)
-                y_predict[i] = score
-            result = y_predict + self.bias
-
-        if result < - range_neutral:
-            return "Negative"
-        elif result <= range_neutral:
-            return "Neutral"
-        else:
-            return "Positive"
+        labels = self.predict_batch(features, range_neutral)
+        if len(labels) == 1:
+            return str(labels[0])
+        return labels
+
+
+def group_identical_vectors(features, labels):
+    """
+    Group the identical (features vector, label) pairs
+    :param features: array of features vectors
+    :param labels: array of labels vectors corresponding to the features
+    :return: tuple of the distinct features vectors, their labels and their number of occurrences
+    """
+    distinct, multiplicity = unique(column_stack((features, labels)), axis=0, return_counts=True)
+    return distinct[:, :-1], distinct[:, -1], multiplicity
 
 
 class SVMPredictor(SVM):
 
     def __init__(self, kernel, C, weights, lagrange_multipliers, support_vectors, support_vectors_labels, bias,
-                 performance):
+                 performance, feature_map=None):
         self.kernel = kernel
         self.C = C
         self.weights = weights
+        self.feature_map = feature_map
         self.lagrange_multipliers = lagrange_multipliers
         self.support_vectors = support_vectors
         self.support_vectors_labels = support_vectors_labels
@@ -157,22 +257,33 @@ def get_from_file(name_file):
     :param name_file: name of the file containing the information to initiate the SVM classifier
     :return: SVM classifier already initiated (ready to predict)
     """
-    with open(get_path_profile(name_file), 'r') as profile:
-        dic_attribute = loads(profile.read())
-
-    if dic_attribute["kernel"] == "linear":
-        kernel = Kernel.linear()
-    elif dic_attribute["kernel"] == "gaussian":
-        kernel = Kernel.gaussian()
-    elif dic_attribute["kernel"] == "poly_kernel":
-        kernel = Kernel.poly_kernel()
+    if name_file.endswith(BINARY_EXTENSION):
+        dic_attribute, arrays = read_binary_profile(get_path_profile(name_file))
+        dic_attribute["weights"] = None
+        dic_attribute.update(arrays)
     else:
+        with open(get_path_profile(name_file), 'r') as profile:
+            dic_attribute = loads(profile.read())
+
+    kernel = Kernel.get_correct_kernel(dic_attribute["kernel"], dic_attribute.get("kernel_parameters"))
+    if kernel is None:
         kernel = Kernel.radial_basis()
 
-    if dic_attribute["weights"]:
-        dic_attribute["weights"] = array(dic_attribute["weights"])
+    if dic_attribute["weights"] is not None:
+        feature_map = None
+        if dic_attribute.get("frequencies") is not None:
+            feature_map = RandomFourierFeatures(asarray(dic_attribute["frequencies"]), asarray(dic_attribute["offsets"]))
+        return SVMPredictor(kernel, dic_attribute["C"], asarray(dic_attribute["weights"]), None, None, None,
+                            dic_attribute["bias"], dic_attribute["performance"], feature_map)
+
+    lagrange_multipliers = asarray(dic_attribute["lagrange_multipliers"])
+    support_vectors = asarray(dic_attribute["support_vectors"])
+    support_vectors_labels = asarray(dic_attribute["support_vectors_labels"])
+    if kernel.name == "linear":
+        # older linear profiles only saved the support vectors : collapse them to the weight vector
+        weights = (lagrange_multipliers * support_vectors_labels).dot(support_vectors)
+        return SVMPredictor(kernel, dic_attribute["C"], weights, None, None, None, dic_attribute["bias"],
+                            dic_attribute["performance"])
 
-    return SVMPredictor(kernel, dic_attribute["C"], dic_attribute["weights"],
-                        array(dic_attribute["lagrange_multipliers"]), array(dic_attribute["support_vectors"]),
-                        array(dic_attribute["support_vectors_labels"]), dic_attribute["bias"],
-                        dic_attribute["performance"])
+    return SVMPredictor(kernel, dic_attribute["C"], None, lagrange_multipliers, support_vectors,
+                        support_vectors_labels, dic_attribute["bias"], dic_attribute["performance"])
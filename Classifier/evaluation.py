@@ -0,0 +1,77 @@
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+from numpy import column_stack, ndarray
+
+from Classifier.SVM import get_from_file
+
+# test features and labels of a worker process, attached once to the shared memory by _init_worker
+_worker_data = dict()
+
+
+def score_classifier(Classifier, features, labels, threshold):
+    """
+    For an array containing multiple features vector with the supposed label, compute the score (%) of the SVM
+    classifier to predict the correct label
+    :param Classifier: SVM classifier to measure the performance of
+    :param features: array of multiple characteristic vectors
+    :param labels: array containing the labels of each characteristic vector
+    :param threshold: From -'threshold' to +'threshold' the class label will be 'Neutral'. In the computation of the
+    performance score, 'Neutral' is both considered 'Positive' and 'Negative'
+    :return: float containing the score of the classifier
+    """
+    result = Classifier.predict_batch(features, threshold)
+    correct = ((result == "Positive") & (labels == 1.0) | (result == "Negative") & (labels == 0.0) |
+               (result == "Neutral")).sum()
+    return float(correct / len(labels) * 100)
+
+
+def _init_worker(name_shared_memory, shape):
+    """
+    Attach a worker process to the shared memory containing the test features and labels
+    :param name_shared_memory: name of the shared memory block
+    :param shape: shape of the array (features vectors with the label as last column)
+    :return:
+    """
+    shared_memory = SharedMemory(name=name_shared_memory)
+    data = ndarray(shape, dtype=float, buffer=shared_memory.buf)
+    _worker_data["shared_memory"] = shared_memory
+    _worker_data["features"], _worker_data["labels"] = data[:, :-1], data[:, -1]
+
+
+def _evaluate_profile(arguments):
+    """
+    Measure the performance of a profile on the shared test features, in a worker process
+    :param arguments: tuple of the profile (name of its file or SVM Predictor already loaded) and the threshold
+    :return: float containing the score of the classifier
+    """
+    profile, threshold = arguments
+    if isinstance(profile, str):
+        profile = get_from_file(profile)
+    return score_classifier(profile, _worker_data["features"], _worker_data["labels"], threshold)
+
+
+def evaluate_profiles(features, labels, threshold, l_profile, processes=None):
+    """
+    Measure the performance of multiple profiles in parallel, in a pool of processes. The test features and labels
+    are placed once in shared memory, the workers read them without any copy.
+    :param features: array of multiple characteristic vectors
+    :param labels: array containing the labels of each characteristic vector
+    :param threshold: From -'threshold' to +'threshold' the class label will be 'Neutral'. In the computation of the
+    performance score, 'Neutral' is both considered 'Positive' and 'Negative'
+    :param l_profile: list of the names of the files of the profiles (loaded by the workers) or of the SVM Predictors
+    already loaded (sent to the workers)
+    :param processes:
+        (optional) number of worker processes
+        (default) number of cores
+    :return: list of the scores of the profiles, in the same order as l_profile
+    """
+    data = column_stack((features, labels)).astype(float)
+    shared_memory = SharedMemory(create=True, size=max(data.nbytes, 1))
+    try:
+        ndarray(data.shape, dtype=float, buffer=shared_memory.buf)[:] = data
+        with Pool(processes, initializer=_init_worker, initargs=(shared_memory.name, data.shape)) as pool:
+            return pool.map(_evaluate_profile, [(profile, threshold) for profile in l_profile])
+    finally:
+        shared_memory.close()
+        shared_memory.unlink()
@@ -1,10 +1,9 @@
 from numpy import array
 
 from Classifier.SVM import SVM
-from Classifier.features import characteristic_vector
-from Data.clean_data import clean_text
+from Classifier.features import characteristic_matrix
 from Data.dataset import get_randomised_sample
-from Ressources.resource import Resource, get_correct_stop_word
+from Ressources.resource import Resource
 
 # Collect some tweets from the data set
 tweets = get_randomised_sample(256)
@@ -12,20 +11,15 @@ tweets = get_randomised_sample(256)
 # Gather the resources for cleaning the text and compute the features vectors
 Resources = Resource()
 
-# Create the cleaned list of label and text contained in the collection
-clean_list_tweet = [x for x in tweets]
-l_label = [float(x[0]) for x in clean_list_tweet]
-l_text = [clean_text(x[1], get_correct_stop_word(Resources)) for x in clean_list_tweet]
-
-# Create the dual array of features and labels for training and testing
-m_features, m_label = list(), list()
-for index, text in enumerate(l_text):
-    feature_vector = characteristic_vector(text, Resources)
-    if feature_vector != [0, 0, 0, 0, 0]:
-        m_features.append(feature_vector)
-        m_label.append(l_label[index])
-m_f_train, m_f_test = array(m_features[:len(m_features) // 2]), array(m_features[len(m_features) // 2:])
-m_l_train, m_l_test = array(m_label[:len(m_label) // 2]), array(m_label[len(m_label) // 2:])
+# Clean the texts and compute the features vectors of the collection in a single array
+m_features = characteristic_matrix([x[1] for x in tweets], Resources)
+m_label = array([float(x[0]) for x in tweets])
+
+# Create the dual array of features and labels for training and testing, without the null vectors
+non_null = m_features.any(axis=1)
+m_features, m_label = m_features[non_null], m_label[non_null]
+m_f_train, m_f_test = m_features[:len(m_features) // 2], m_features[len(m_features) // 2:]
+m_l_train, m_l_test = m_label[:len(m_label) // 2], m_label[len(m_label) // 2:]
 
 # Create an SVM classifier
 Classifier = SVM()
@@ -34,7 +28,7 @@ Classifier = SVM()
 Classifier.fit(m_f_train, m_l_train)
 
 # Predict the labels of the testing collection
-result = [Classifier.predict(array([x.tolist()])) for x in m_f_test]
+result = Classifier.predict_batch(m_f_test)
 
 # Result of the prediction
 correct = 0
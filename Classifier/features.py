@@ -4,46 +4,75 @@
 # http://positivewordsresearch.com/liste-des-mots-positifs/ : french positive words
 # http://richesse-et-finance.com/liste-mots-cles-negatifs/ : french negative words
 
-from re import match
+from hashlib import sha256
+from itertools import islice
+from re import compile
+from weakref import WeakKeyDictionary
 
+from numpy import concatenate, empty, int16
 
-def _count_generic(list_element, list_words, weight=1):
+from Data.clean_data import clean_texts, cleaning_rules_hash
+from Ressources.resource import get_correct_stop_word
+
+# a negation is an element matching one of these patterns (from its beginning)
+_NEGATION_PATTERNS = {'fr': compile(rb'ne|n\'.*'),
+                      'en': compile(rb'.*n\'t|neither|not|nor')}
+
+# lexicon index of each Resource object, built once and forgotten with the Resource
+_lexicon_indexes = WeakKeyDictionary()
+
+
+def _hash_words(words):
     """
-    Generic function to count the number of element from list_element in list_words.
-    We can also apply a weight on the counting (emoticons have somehow bigger impact on the sentiment).
-    :param list_element: list of elements we need to confront to list_words
-    :param list_words: list of words that we are trying to count in list_element
-    :param weight: importance coefficient to use
-    :return: None, this function will be used in a thread (hence the dict)
+    Content hash of a list of words, whatever their order and repetitions
+    :param words: iterable of words (bytes)
+    :return: hexadecimal SHA-256 hash of the words
     """
-    count = 0
-    for element in list_element:
-        if element in list_words:
-            count += 1 * weight
-    return count
+    return sha256(b'\n'.join(sorted(frozenset(words)))).hexdigest()
 
 
-def _negation_presence(list_element, language='en'):
+def feature_hashes(Resource, language='en'):
     """
-    Method to be called within a thread to detect whether there is a negation or not among the elements of the tweets
-    contained in the list of elements.
-    :param list_element: list of relevant element in the tweet
+    Content hashes of everything a characteristic vector depends on : the lexicons, the stop words of the language, the
+    negation patterns and the cleaning rules. The vectors computed with the same hashes are the same.
+    :param Resource: class object containing all the resources (positive words, negative words, positive emoticons,
+    negative emoticons, stop words)
     :param language: Choose the language from french to english
         'fr' | 'en'
-    :return: None, this function will be used in a thread (hence the dict)
+    :return: dictionary name of the resource -> hexadecimal SHA-256 hash
+    """
+    return {"positive_words": _hash_words(Resource.positive_words),
+            "negative_words": _hash_words(Resource.negative_words),
+            "positive_emoticons": _hash_words(Resource.positive_emoticons),
+            "negative_emoticons": _hash_words(Resource.negative_emoticons),
+            "stop_words": _hash_words(get_correct_stop_word(Resource, language)),
+            "negation": sha256(_NEGATION_PATTERNS[language].pattern).hexdigest(),
+            "cleaning_rules": cleaning_rules_hash()}
+
+
+def _lexicon_index(Resource):
     """
-    if language == 'fr':
-        for element in list_element:
-            if match(rb'ne|n\'.*', element):
-                return 1
-    elif language == 'en':
-        for element in list_element:
-            if match(rb'.*n\'t', element) or match(rb'neither|not|nor', element):
-                return 1
-    return 0
-
-
-def characteristic_vector(list_element_tweet, Resource):
+    Index all the elements of the lexicons of the resources : each element is associated with its contribution to
+    the counts of positive words, negative words, positive emoticons and negative emoticons (emoticons have somehow
+    bigger impact on the sentiment, they count twice).
+    :param Resource: class object containing all the resources (positive words, negative words, positive emoticons,
+    negative emoticons, stop words)
+    :return: dictionary element -> tuple of the 4 contributions
+    """
+    index = _lexicon_indexes.get(Resource)
+    if index is None:
+        contributions = dict()
+        lexicons = [(Resource.positive_words, 1), (Resource.negative_words, 1), (Resource.positive_emoticons, 2),
+                    (Resource.negative_emoticons, 2)]
+        for position, (list_words, weight) in enumerate(lexicons):
+            for word in frozenset(list_words):
+                contributions.setdefault(word, [0, 0, 0, 0])[position] = weight
+        index = {word: tuple(contribution) for word, contribution in contributions.items()}
+        _lexicon_indexes[Resource] = index
+    return index
+
+
+def characteristic_vector(list_element_tweet, Resource, language='en'):
     """
     Creation of the characteristic vector to further use in a classifier.
     The characteristics to be counted :
@@ -52,13 +81,69 @@ def characteristic_vector(list_element_tweet, Resource):
         - Number of positive emoticons
         - Number of negative emoticons
         - Presence of negation
+    All the characteristics are computed in a single pass over the elements of the tweet.
     :param Resource: class object containing all the resources (positive words, negative words, positive emoticons,
     negative emoticons, stop words)
     :param list_element_tweet: list of key elements of a tweet
+    :param language: language of the negations to detect
+        'fr' | 'en'
     :return: list / vector
     """
+    index = _lexicon_index(Resource)
+    pattern = _NEGATION_PATTERNS.get(language)
+    positive_words, negative_words, positive_emoticons, negative_emoticons, negation = 0, 0, 0, 0, 0
+    for element in list_element_tweet:
+        contribution = index.get(element)
+        if contribution is not None:
+            positive_words += contribution[0]
+            negative_words += contribution[1]
+            positive_emoticons += contribution[2]
+            negative_emoticons += contribution[3]
+        if not negation and pattern is not None and pattern.match(element):
+            negation = 1
+    return [positive_words, negative_words, positive_emoticons, negative_emoticons, negation]
+
+
+def characteristic_matrices(texts, Resource, language='en', chunk_size=10000):
+    """
+    Clean and compute the characteristic vectors of raw texts / tweets, chunk by chunk, so that only one chunk of
+    texts is kept in memory at a time
+    :param texts: iterable of strings containing the raw texts / tweets
+    :param Resource: class object containing all the resources (positive words, negative words, positive emoticons,
+    negative emoticons, stop words)
+    :param language: language of the stop words removed from the texts and of the negations detected
+        'fr' | 'en'
+    :param chunk_size: number of texts per chunk
+    :return: generator of arrays (chunk_size x 5, int16) of characteristic vectors
+    """
+    stop_words = get_correct_stop_word(Resource, language)
+    texts = iter(texts)
+    chunk = list(islice(texts, chunk_size))
+    while chunk:
+        matrix = empty((len(chunk), 5), dtype=int16)
+        matrix[:] = [characteristic_vector(list_element, Resource, language)
+                     for list_element in clean_texts(chunk, stop_words)]
+        yield matrix
+        chunk = list(islice(texts, chunk_size))
+
 
-    return [_count_generic(list_element_tweet, Resource.positive_words),
-            _count_generic(list_element_tweet, Resource.negative_words),
-            _count_generic(list_element_tweet, Resource.positive_emoticons, 2),
-            _count_generic(list_element_tweet, Resource.negative_emoticons, 2), _negation_presence(list_element_tweet)]
+def characteristic_matrix(texts, Resource, language='en', chunk_size=10000):
+    """
+    Clean and compute the characteristic vectors of raw texts / tweets in a single array
+    :param texts: iterable of strings containing the raw texts / tweets
+    :param Resource: class object containing all the resources (positive words, negative words, positive emoticons,
+    negative emoticons, stop words)
+    :param language: language of the stop words removed from the texts and of the negations detected
+        'fr' | 'en'
+    :param chunk_size: number of texts cleaned and counted at once
+    :return: array (N x 5, int16) of the characteristic vectors, in the order of the texts
+    """
+    if not hasattr(texts, '__len__'):
+        return concatenate([empty((0, 5), dtype=int16)] + list(characteristic_matrices(texts, Resource, language,
+                                                                                       chunk_size)))
+    matrix = empty((len(texts), 5), dtype=int16)
+    position = 0
+    for chunk in characteristic_matrices(texts, Resource, language, chunk_size):
+        matrix[position:position + len(chunk)] = chunk
+        position += len(chunk)
+    return matrix
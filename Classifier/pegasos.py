@@ -0,0 +1,47 @@
+# https://www.cs.huji.ac.il/~shais/papers/ShalevSiSrCo10.pdf : Pegasos, Primal Estimated sub-GrAdient SOlver for SVM
+
+from numpy import hstack, ones, sqrt, where, zeros
+
+from Classifier.Kernel import Kernel
+from Classifier.SVM import SVM
+
+
+def pegasos(batches, epochs=5, regularization=1e-4, n_features=5):
+    """
+    Train a linear SVM classifier with the mini-batch Pegasos stochastic sub-gradient descent. The batches are consumed
+    one after the other, so the memory used does not depend on the size of the data set.
+    :param batches: function returning, for each epoch, a new iterable of tuples (array of features vectors, array of
+    labels). The convergence assumes random samples : each epoch should read the vectors in a new random order
+    :param epochs: number of passes over the whole data set
+    :param regularization: strength of the regularization (lambda), the smaller the closer to a hard margin
+    :param n_features: size of the features vectors
+    :return: SVM classifier with a linear kernel (ready to predict and to be saved to a file)
+    """
+    # the bias is learnt as the weight of an extra constant feature
+    weights = zeros(n_features + 1)
+    average = zeros(n_features + 1)
+    radius = 1 / sqrt(regularization)
+    step = 0
+    for _ in range(epochs):
+        for features, labels in batches():
+            features = hstack((features.astype(float), ones((len(features), 1))))
+            labels = where(labels > 0, 1.0, -1.0)
+            step += 1
+            learning_rate = 1 / (regularization * step)
+
+            violators = labels * features.dot(weights) < 1
+            weights *= 1 - learning_rate * regularization
+            weights += learning_rate / len(labels) * labels[violators].dot(features[violators])
+
+            # projection on the ball containing the optimal solution
+            norm = sqrt(weights.dot(weights))
+            if norm > radius:
+                weights *= radius / norm
+
+            # the average of the iterates is far less noisy than the last one
+            average += (weights - average) / step
+
+    Classifier = SVM(Kernel.linear(), solver="pegasos")
+    Classifier.weights = average[:-1]
+    Classifier.bias = float(average[-1])
+    return Classifier
@@ -1,6 +1,18 @@
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from os import cpu_count, listdir, sysconf
+
+from numpy import cumsum, dot, ndarray, ones
+
 from Classifier.Kernel import Kernel
-from Classifier.SVM import SVM
+from Classifier.Profile.profile_file import binary_name_file, get_directory_profile
+from Classifier.SVM import SVM, get_from_file, group_identical_vectors
+from Classifier.features import feature_hashes
+from Classifier.pegasos import pegasos
+from Classifier.reduction import random_fourier_classifier, reduce_support_vectors
 from Data.dataset import get_characteristic_label_vectors
+from Data.feature_store import load_manifest, shuffled_feature_store_batches
+from Data.sampling import get_generator
 
 
 def readable_name_classifier(name_file):
@@ -51,7 +63,7 @@ def construct_name_file(size_sample, randomness, pos_equal_neg, kernel):
 
 
 def create_SVM_profile(size_sample, randomness, pos_equal_neg, kernel, Resource, m_features=None,
-                       m_labels=None, language='en'):
+                       m_labels=None, language='en', solver="cvxopt", C=None, seed=None):
     """
     With the desired parameters, create a SVM classifier and save it to a file
     :param Resource: class object containing all the resources (positive words, negative words, positive emoticons,
@@ -68,34 +80,228 @@ def create_SVM_profile(size_sample, randomness, pos_equal_neg, kernel, Resource,
         (default) will construct an array of labels vector
     :param language: Choose the language from french to english
         'fr' | 'en'
+    :param solver: solver of the quadratic problem ('smo' does not support the poly_kernel)
+        'cvxopt' | 'smo'
+    :param C: upper bound of the Lagrange multipliers (soft margin), None for a hard margin
+    :param seed: (optional) seed of the random sample of characteristic vectors, to build the same profile again
     :return:
     """
     if m_features is None and m_labels is None:
         m_features, m_labels = get_characteristic_label_vectors(size_sample, randomness, pos_equal_neg, Resource, False,
-                                                                language)
+                                                                language, seed)
 
-    Classifier = SVM(kernel)
+    Classifier = SVM(kernel, C, solver)
     Classifier.fit(m_features, m_labels)
 
-    name_file = construct_name_file(size_sample, randomness, pos_equal_neg, str(kernel).split('.')[1])
+    name_file = construct_name_file(size_sample, randomness, pos_equal_neg, kernel.name)
 
     Classifier.save_to_file(name_file)
 
 
-def generate_profiles(Resource, name_kernel=None, l_size=None, l_random=None, l_pos_eq_neg=None, language='en'):
+def streaming_name_file(name_file):
+    """
+    Name of a profile trained by the streaming Pegasos trainer, distinct from the profile trained on the same number of
+    vectors by the quadratic problem solvers
+    :param name_file: name of the profile file ('xxx_linear.json')
+    :return: string name of the file of the streaming profile ('xxx_linear-pegasos.json')
+    """
+    name, extension = name_file.rsplit('.', 1)
+    return "{}-pegasos.{}".format(name, extension)
+
+
+def create_streaming_linear_profile(Resource, epochs=5, batch_size=1000, regularization=1e-4, language='en', seed=None):
     """
-    Generate multiple profiles for one or more kernels
+    Train a linear SVM classifier over the whole feature store with the streaming Pegasos trainer and save it to a file.
+    The vectors are read by mini batches in a new random order at each epoch.
+    :param Resource: class object containing all the resources (positive words, negative words, positive emoticons,
+    negative emoticons, stop words), the feature store must have been computed with them
+    :param epochs: number of passes over the whole data set
+    :param batch_size: number of characteristic vectors per mini batch
+    :param regularization: strength of the regularization of the Pegasos trainer
+    :param language: Choose the language from french to english
+        'fr' | 'en'
+    :param seed: (optional) seed of the random order of the vectors, to build the same profile again
+    :return: name of the file of the profile
+    """
+    generator, hashes = get_generator(seed), feature_hashes(Resource, language)
+    Classifier = pegasos(lambda: shuffled_feature_store_batches(batch_size, generator, hashes), epochs,
+                         regularization)
+
+    # named after the number of vectors of the store, read in a random order
+    nb_vectors = sum(shard["rows"] for shard in load_manifest()["shards"])
+    name_file = streaming_name_file(construct_name_file(nb_vectors, True, False, Classifier.kernel.name))
+
+    Classifier.save_to_file(name_file)
+    return name_file
+
+
+# memory of a worker process training on n vectors, in n x n arrays of floats : Gram matrix, products of the labels,
+# matrices P and G of the quadratic problem and the copies made by cvxopt
+_WORKER_MATRICES = 10
+
+
+def _available_memory():
+    """
+    Physical memory currently available
+    :return: number of bytes, or None when the platform does not tell it
+    """
+    try:
+        return sysconf("SC_AVPHYS_PAGES") * sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _nb_processes(n_samples, processes=None, memory=None):
+    """
+    Number of worker processes that can train on a sample at the same time without exceeding the memory budget
+    :param n_samples: number of vectors of the largest sample
+    :param processes:
+        (optional) number of worker processes asked
+        (default) number of cores
+    :param memory:
+        (optional) memory budget in bytes
+        (default) physical memory available
+    :return: number of worker processes, at least 1
+    """
+    if processes is None:
+        processes = cpu_count() or 1
+    if memory is None:
+        memory = _available_memory()
+    if memory is None:
+        return processes
+    # the shared inner products are counted once, every worker builds its own matrices
+    memory -= 8 * n_samples ** 2
+    return max(1, min(processes, memory // (8 * _WORKER_MATRICES * n_samples ** 2)))
+
+
+def _sample_bounds(n_samples, n_features):
+    """
+    Bounds of the features, labels, multiplicity and inner products in the shared memory block of a sample
+    :return: array of the 5 bounds
+    """
+    return cumsum([0, n_samples * n_features, n_samples, n_samples, n_samples ** 2])
+
+
+def _share_sample(features, labels, multiplicity):
+    """
+    Copy a training sample in a shared memory block, to be read by the worker processes. The inner products of the
+    vectors are computed straight into the block, the squared distances are derived from them by the workers.
+    :return: tuple of the shared memory block and its description (name, number of vectors, number of features)
+    """
+    n_samples, n_features = features.shape
+    bounds = _sample_bounds(n_samples, n_features)
+    shared_memory = SharedMemory(create=True, size=8 * int(bounds[-1]))
+    data = ndarray(bounds[-1], dtype=float, buffer=shared_memory.buf)
+    data[bounds[0]:bounds[1]] = features.ravel()
+    data[bounds[1]:bounds[2]] = labels
+    data[bounds[2]:bounds[3]] = multiplicity
+    shared_features = data[bounds[0]:bounds[1]].reshape(n_samples, n_features)
+    dot(shared_features, shared_features.T, out=data[bounds[3]:bounds[4]].reshape(n_samples, n_samples))
+    del data, shared_features
+    return shared_memory, (shared_memory.name, n_samples, n_features)
+
+
+def _attach_sample(name_shared_memory, n_samples, n_features):
+    """
+    Read a training sample and its inner products from a shared memory block created by _share_sample
+    :return: tuple of the shared memory block, features, labels, multiplicity and inner products
+    """
+    shared_memory = SharedMemory(name=name_shared_memory)
+    bounds = _sample_bounds(n_samples, n_features)
+    data = ndarray(bounds[-1], dtype=float, buffer=shared_memory.buf)
+    features = data[bounds[0]:bounds[1]].reshape(n_samples, n_features)
+    inner_products = data[bounds[3]:bounds[4]].reshape(n_samples, n_samples)
+    return shared_memory, features, data[bounds[1]:bounds[2]], data[bounds[2]:bounds[3]], inner_products
+
+
+def _train_profile_job(job):
+    """
+    Train one SVM classifier (one sample, one kernel) in a worker process and save it to a file
+    :param job: tuple (size of the sample, randomness, pos_equal_neg, name of the kernel, solver, C, description of the
+    shared sample)
+    :return: tuple of the name of the file of the profile and the error message (None when the profile is saved)
+    """
+    size_sample, randomness, pos_equal_neg, name_kernel, solver, C, description = job
+    shared_memory, features, labels, multiplicity, inner_products = _attach_sample(*description)
+    kernel = Kernel.get_correct_kernel(name_kernel)
+    name_file = construct_name_file(size_sample, randomness, pos_equal_neg, kernel.name)
+    try:
+        Classifier = SVM(kernel, C, solver)
+        Classifier.fit(features, labels, multiplicity=multiplicity, gram=kernel.from_inner_products(inner_products))
+        Classifier.save_to_file(name_file)
+    except (ValueError, ArithmeticError) as error:
+        # a quadratic problem the solver can not solve only loses its own profile
+        return name_file, "{}: {}".format(type(error).__name__, error)
+    finally:
+        del features, labels, multiplicity, inner_products
+        shared_memory.close()
+    return name_file, None
+
+
+def _print_progress(nb_done, nb_jobs, name_file, error=None):
+    """
+    Default progress report of generate_profiles
+    :param nb_done: number of profiles already trained
+    :param nb_jobs: total number of profiles to generate
+    :param name_file: name of the file of the profile just trained
+    :param error: (optional) error message when the profile could not be trained
+    :return:
+    """
+    if error is None:
+        print("[{}/{}] {}".format(nb_done, nb_jobs, name_file))
+    else:
+        print("[{}/{}] {} failed ({})".format(nb_done, nb_jobs, name_file, error))
+
+
+def _report_profiles(results, nb_jobs, progress, nb_done=0):
+    """
+    Report the profiles as they are trained
+    :param results: iterable of the tuples (name of the file, error message) returned by the jobs
+    :param nb_jobs: total number of profiles to generate
+    :param progress: function called with (number of profiles done, total number of profiles, name of the file, error
+    message or None) for each profile
+    :param nb_done: number of profiles already reported
+    :return: list of tuples (name of the file, error message) of the profiles that could not be trained
+    """
+    failures = list()
+    for nb_done, (name_file, error) in enumerate(results, nb_done + 1):
+        progress(nb_done, nb_jobs, name_file, error)
+        if error is not None:
+            failures.append((name_file, error))
+    return failures
+
+
+def generate_profiles(Resource, name_kernel=None, l_size=None, l_random=None, l_pos_eq_neg=None, language='en',
+                      processes=None, progress=_print_progress, seed=None, solver="cvxopt", C=None, memory=None):
+    """
+    Generate multiple profiles for one or more kernels. Every (sample, kernel) training is a job run in a pool of
+    processes. The samples are trained one after the other : the inner products of a sample are computed once and
+    shared by the jobs of its kernels, and released before the next sample. A profile that can not be trained is
+    reported and skipped, the other profiles are still saved.
     :param Resource: class object containing all the resources (positive words, negative words, positive emoticons,
     negative emoticons, stop words)
     :param name_kernel:
         (optional) name of the kernel to use
-        (default) will construct profiles for every kernel (linear, poly_kernel, gaussian)
+        (default) will construct profiles for every kernel (linear, poly_kernel, gaussian, radial_basis)
     :param l_size: list of the desired size of characteristic vectors
     :param l_random: list of situation of randomness
     :param l_pos_eq_neg: list of situation of positives equal negatives
     :param language: Choose the language from french to english
         'fr' | 'en'
-    :return:
+    :param processes:
+        (optional) number of worker processes, 1 to train in the current process
+        (default) number of cores
+        In both cases, the number of workers is lowered so that their matrices fit in the memory budget
+    :param progress: function called with (number of profiles done, total number of profiles, name of the file, error
+    message or None) each time a profile is trained
+    :param seed: (optional) seed of the random samples of characteristic vectors, to build the same profiles again
+    :param solver: solver of the quadratic problem ('smo' does not support the poly_kernel)
+        'cvxopt' | 'smo'
+    :param C: upper bound of the Lagrange multipliers (soft margin), None for a hard margin
+    :param memory:
+        (optional) memory budget of the training in bytes
+        (default) physical memory available
+    :return: list of tuples (name of the file, error message) of the profiles that could not be trained
     """
     if l_random is None:
         l_random = [True, False]
@@ -103,25 +309,119 @@ def generate_profiles(Resource, name_kernel=None, l_size=None, l_random=None, l_
         l_pos_eq_neg = [True, False]
     if l_size is None:
         l_size = [1000, 10000]
+    if type(name_kernel) is str:
+        name_kernel = [name_kernel]
+    elif name_kernel is None:
+        name_kernel = ["linear", "poly_kernel", "gaussian", "radial_basis"]
+
+    samples = [(size_sample, randomness, pos_eq_neg) for size_sample in l_size for randomness in l_random
+               for pos_eq_neg in l_pos_eq_neg]
+    nb_jobs = len(samples) * len(name_kernel)
+    processes = min(_nb_processes(max(l_size), processes, memory), len(name_kernel))
 
-    for size_sample in l_size:
-        for randomness in l_random:
-            for pos_eq_neg in l_pos_eq_neg:
-                m_features, m_labels = get_characteristic_label_vectors(size_sample, randomness, pos_eq_neg, Resource,
-                                                                        False, language)
-                if type(name_kernel) is str:
-                    kernel = Kernel.get_correct_kernel(name_kernel)
-                    create_SVM_profile(size_sample, randomness, pos_eq_neg, kernel, Resource, m_features, m_labels)
-                elif type(name_kernel) is list:
-                    for name in name_kernel:
-                        kernel = Kernel.get_correct_kernel(name)
-                        create_SVM_profile(size_sample, randomness, pos_eq_neg, kernel, Resource, m_features, m_labels)
+    failures, pool = list(), None
+    try:
+        if processes > 1:
+            pool = Pool(processes)
+        for index, (size_sample, randomness, pos_eq_neg) in enumerate(samples):
+            m_features, m_labels = get_characteristic_label_vectors(size_sample, randomness, pos_eq_neg, Resource,
+                                                                    False, language, seed)
+            if C is not None or solver == "smo":
+                features, labels, multiplicity = group_identical_vectors(m_features, m_labels)
+            else:
+                # the hard margin cvxopt problem can not weight the vectors, they are not grouped
+                features, labels, multiplicity = m_features, m_labels, ones(len(m_labels))
+            shared_memory, description = _share_sample(features, labels, multiplicity)
+            del m_features, m_labels, features, labels, multiplicity
+            try:
+                jobs = [(size_sample, randomness, pos_eq_neg, name, solver, C, description) for name in name_kernel]
+                if pool is None:
+                    results = map(_train_profile_job, jobs)
                 else:
-                    create_SVM_profile(size_sample, randomness, pos_eq_neg, Kernel.linear(), Resource, m_features,
-                                       m_labels)
-                    create_SVM_profile(size_sample, randomness, pos_eq_neg, Kernel.poly_kernel(), Resource, m_features,
-                                       m_labels)
-                    create_SVM_profile(size_sample, randomness, pos_eq_neg, Kernel.gaussian(), Resource, m_features,
-                                       m_labels)
-                    create_SVM_profile(size_sample, randomness, pos_eq_neg, Kernel.radial_basis(), Resource, m_features,
-                                       m_labels)
+                    results = pool.imap_unordered(_train_profile_job, jobs)
+                failures += _report_profiles(results, nb_jobs, progress, index * len(name_kernel))
+            finally:
+                shared_memory.close()
+                shared_memory.unlink()
+    finally:
+        if pool is not None:
+            pool.terminate()
+    return failures
+
+
+def convert_profile_to_binary(name_file):
+    """
+    Convert a JSON profile to the binary profile format (same name with the '.svm' extension)
+    :param name_file: name of the JSON file of the profile
+    :return: name of the binary file of the profile
+    """
+    name_binary_file = binary_name_file(name_file)
+    get_from_file(name_file).save_to_file(name_binary_file)
+    return name_binary_file
+
+
+def convert_all_profiles_to_binary():
+    """
+    Convert every JSON profile of the Profile directory to the binary profile format
+    :return: list of the names of the binary files created
+    """
+    return [convert_profile_to_binary(name_file) for name_file in sorted(listdir(get_directory_profile()))
+            if name_file.endswith(".json")]
+
+
+def reduced_name_file(name_file):
+    """
+    Name of the reduced version of a profile
+    :param name_file: name of the profile file ('xxx_radial_basis.json')
+    :return: string name of the file of the reduced profile ('xxx_radial_basis-reduced.json')
+    """
+    name, extension = name_file.rsplit('.', 1)
+    return "{}-reduced.{}".format(name, extension)
+
+
+def reduce_profile(name_file, Resource, target=None, tolerance=1.0, nb_tweet_sample=10000, threshold=0.25,
+                   language='en'):
+    """
+    Compress a radial_basis or gaussian profile to a smaller set of support vectors and save it to its own file
+    :param name_file: name of the file of the profile to reduce
+    :param Resource: class object containing all the resources (positive words, negative words, positive emoticons,
+    negative emoticons, stop words)
+    :param target: (optional) number of support vectors to keep
+    :param tolerance: maximal loss of performance score (in %) accepted when target is not given
+    :param nb_tweet_sample: size of the sample used to measure the performance before and after the reduction
+    :param threshold: From -'threshold' to +'threshold' the class label will be 'Neutral'. In the computation of the
+    performance score, 'Neutral' is both considered 'Positive' and 'Negative'
+    :param language: Choose the language from french to english
+        'fr' | 'en'
+    :return: tuple of the name of the file of the reduced profile and the report of the reduction
+    """
+    m_features, m_labels = get_characteristic_label_vectors(nb_tweet_sample, True, True, Resource, False, language)
+    Reduced, report = reduce_support_vectors(get_from_file(name_file), m_features, m_labels, threshold, target,
+                                             tolerance)
+    name_reduced_file = reduced_name_file(name_file)
+    Reduced.save_to_file(name_reduced_file)
+    return name_reduced_file, report
+
+
+def fourier_name_file(name_file, dimension):
+    """
+    Name of the random Fourier features version of a profile
+    :param name_file: name of the profile file ('xxx_gaussian.json')
+    :param dimension: number of random features
+    :return: string name of the file of the random Fourier features profile ('xxx_gaussian-rff500.json')
+    """
+    name, extension = name_file.rsplit('.', 1)
+    return "{}-rff{}.{}".format(name, dimension, extension)
+
+
+def create_random_fourier_profile(name_file, dimension=500, seed=None):
+    """
+    Approximate a radial_basis or gaussian profile with random Fourier features and save it to its own file
+    :param name_file: name of the file of the profile to approximate
+    :param dimension: number of random features, the larger the more accurate and the slower to predict
+    :param seed: seed of the random generator (None for a random one)
+    :return: name of the file of the random Fourier features profile
+    """
+    name_fourier_file = fourier_name_file(name_file, dimension)
+    random_fourier_classifier(get_from_file(name_file), dimension, seed).save_to_file(name_fourier_file)
+    return name_fourier_file
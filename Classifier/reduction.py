@@ -0,0 +1,172 @@
+# http://www.kernel-machines.org/papers/upload_4767_reduced.pdf : Input space versus feature space in kernel-based
+# methods (reduced set construction)
+# https://people.eecs.berkeley.edu/~brecht/papers/07.rah.rec.nips.pdf : Random Features for Large-Scale Kernel Machines
+
+from numpy import abs as absolute, argmin, array, asarray, delete, inf, sign, unique, vstack
+from numpy.linalg import lstsq
+
+from Classifier.SVM import SVMPredictor
+from Classifier.evaluation import score_classifier
+
+# kernels depending only on the distance between two vectors, with k(x, x) = 1 : two support vectors can be merged
+_MERGEABLE_KERNELS = ["gaussian", "radial_basis"]
+# with a tolerance, every number of support vectors up to this one is scored, the larger numbers are halved
+_EXHAUSTIVE_SIZE = 100
+
+
+def _check_support_vectors(Classifier):
+    """
+    Check that a SVM Predictor is a radial_basis or gaussian profile defined by its support vectors (the linear
+    profiles are collapsed to a weight vector and the random Fourier features profiles have no support vectors)
+    :param Classifier: SVM Predictor
+    :return:
+    """
+    if Classifier.kernel.name not in _MERGEABLE_KERNELS:
+        raise ValueError("only the {} profiles can be approximated, not a {} profile".format(
+            " and ".join(_MERGEABLE_KERNELS), Classifier.kernel.name))
+    if Classifier.support_vectors is None:
+        raise ValueError("the profile has no support vectors to approximate (already a random Fourier features "
+                         "profile)")
+
+
+def _merge_chain(kernel, support_vectors, coefficients):
+    """
+    Reduce the expansion one vector at a time : the vector of smallest |coefficient| is merged with its nearest
+    neighbour of the same sign, z = weighted mean of the two vectors and its coefficient is the projection of the pair
+    on z. A vector without neighbour of the same sign is just pruned.
+    :param kernel: kernel of the SVM classifier
+    :param support_vectors: array of the support vectors
+    :param coefficients: array of the dual coefficients (lagrange multiplier x label) of the support vectors
+    :return: generator of the tuples (vectors, coefficients) of the expansion, from all the vectors down to none. The
+    arrays are modified by the next step, they should be used before.
+    """
+    vectors, coefficients = array(support_vectors, dtype=float), coefficients.copy()
+    yield vectors, coefficients
+    while len(coefficients):
+        i = argmin(absolute(coefficients))
+        candidates = sign(coefficients) == sign(coefficients[i])
+        candidates[i] = False
+        if candidates.any():
+            distances = ((vectors - vectors[i]) ** 2).sum(axis=1)
+            distances[~candidates] = inf
+            j = argmin(distances)
+            merged = (absolute(coefficients[i]) * vectors[i] + absolute(coefficients[j]) * vectors[j]) / (
+                absolute(coefficients[i]) + absolute(coefficients[j]))
+            similarities = kernel.matrix(vectors[[i, j]], merged[None, :])[:, 0]
+            coefficients[j] = coefficients[[i, j]].dot(similarities)
+            vectors[j] = merged
+        vectors, coefficients = delete(vectors, i, axis=0), delete(coefficients, i)
+        yield vectors, coefficients
+
+
+def _non_null_expansion(Classifier):
+    """
+    Support vectors and dual coefficients of a SVM Predictor, without the support vectors with a null coefficient
+    (label 0) that do not contribute to the decision function
+    :param Classifier: SVM Predictor
+    :return: tuple of the support vectors and their coefficients
+    """
+    coefficients = Classifier.lagrange_multipliers * Classifier.support_vectors_labels
+    non_null = coefficients != 0
+    return Classifier.support_vectors[non_null], coefficients[non_null]
+
+
+def _refit(Classifier, vectors, coefficients, points, original):
+    """
+    Build a SVM Predictor from a reduced set of vectors : the coefficients (least squares) and then the bias are
+    refitted on the original decision function
+    :param Classifier: SVM Predictor reduced
+    :param vectors: array of the reduced set of vectors
+    :param coefficients: array of their coefficients
+    :param points: array of features vectors on which the decision function is approximated
+    :param original: decision function of the classifier (without its bias) on the points
+    :return: SVM Predictor with the reduced set of support vectors
+    """
+    similarities = Classifier.kernel.matrix(points, vectors)
+    if len(coefficients):
+        coefficients = lstsq(similarities, original, rcond=None)[0]
+    residuals = original - similarities.dot(coefficients)
+    bias = Classifier.bias + float(residuals.mean())
+
+    return SVMPredictor(Classifier.kernel, Classifier.C, None, absolute(coefficients), vectors.copy(),
+                        sign(coefficients) + (coefficients == 0), bias, Classifier.performance)
+
+
+def _reduce(Classifier, target, points):
+    """
+    Build a SVM Predictor with at most 'target' support vectors approximating the decision function of the classifier
+    :param Classifier: SVM Predictor to reduce
+    :param target: number of support vectors to keep
+    :param points: array of features vectors on which the decision function is approximated
+    :return: SVM Predictor with the reduced set of support vectors
+    """
+    for vectors, coefficients in _merge_chain(Classifier.kernel, *_non_null_expansion(Classifier)):
+        if len(coefficients) <= target:
+            break
+    return _refit(Classifier, vectors, coefficients, points, Classifier.decision_function(points) - Classifier.bias)
+
+
+def reduce_support_vectors(Classifier, features, labels, threshold=0.25, target=None, tolerance=1.0):
+    """
+    Compress a SVM Predictor (radial_basis, gaussian) : the support vectors with the smallest |lagrange multiplier| are
+    merged with their nearest neighbour (or pruned) and then the coefficients and the bias are refitted, so that the
+    decision function is approximated with far less support vectors, without training again
+    :param Classifier: SVM Predictor to reduce
+    :param features: array of features vectors used to measure the performance (and to refit the coefficients)
+    :param labels: array containing the labels of each features vector
+    :param threshold: From -'threshold' to +'threshold' the class label will be 'Neutral'. In the computation of the
+    performance score, 'Neutral' is both considered 'Positive' and 'Negative'
+    :param target:
+        (optional) number of support vectors to keep
+        (default) the smallest number of support vectors respecting the tolerance : the performance does not only grow
+        with the number of support vectors, so every number up to _EXHAUSTIVE_SIZE is scored (and the halves of the
+        larger numbers)
+    :param tolerance: maximal loss of performance score (in %) accepted when target is not given
+    :return: tuple of the reduced SVM Predictor and a dictionary reporting the number of support vectors and the
+    performance score before and after the reduction
+    """
+    _check_support_vectors(Classifier)
+    points = unique(vstack((Classifier.support_vectors, features)), axis=0)
+    performance = score_classifier(Classifier, features, labels, threshold)
+    n_support_vectors = len(Classifier.support_vectors)
+
+    if target is not None:
+        Reduced = _reduce(Classifier, target, points)
+    else:
+        # a single merge chain, the smallest scored expansion within the tolerance is kept
+        Reduced, next_size = Classifier, n_support_vectors
+        original = Classifier.decision_function(points) - Classifier.bias
+        for vectors, coefficients in _merge_chain(Classifier.kernel, *_non_null_expansion(Classifier)):
+            size = len(coefficients)
+            if size == 0:
+                break
+            if size > next_size and size > _EXHAUSTIVE_SIZE:
+                continue
+            next_size = size // 2
+            candidate = _refit(Classifier, vectors, coefficients, points, original)
+            if performance - score_classifier(candidate, features, labels, threshold) <= tolerance:
+                Reduced = candidate
+
+    reduced_performance = score_classifier(Reduced, features, labels, threshold)
+    report = {"support_vectors": n_support_vectors, "reduced_support_vectors": len(Reduced.support_vectors),
+              "performance": performance, "reduced_performance": reduced_performance,
+              "delta": reduced_performance - performance}
+    return Reduced, report
+
+
+def random_fourier_classifier(Classifier, dimension=500, seed=None):
+    """
+    Approximate a SVM Predictor (radial_basis, gaussian) by a linear model in a random Fourier feature space : the
+    prediction becomes a single dot product of size 'dimension', whatever the number of support vectors
+    :param Classifier: SVM Predictor to approximate
+    :param dimension: number of random features, the larger the more accurate and the slower
+    :param seed: seed of the random generator (None for a random one)
+    :return: SVM Predictor using the random Fourier features
+    """
+    _check_support_vectors(Classifier)
+    support_vectors = asarray(Classifier.support_vectors, dtype=float)
+    feature_map = Classifier.kernel.random_features(support_vectors.shape[1], dimension, seed)
+    weights = (Classifier.lagrange_multipliers * Classifier.support_vectors_labels).dot(
+        feature_map.transform(support_vectors))
+    return SVMPredictor(Classifier.kernel, Classifier.C, weights, None, None, None, Classifier.bias,
+                        Classifier.performance, feature_map)
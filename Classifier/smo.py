@@ -0,0 +1,234 @@
+# https://www.csie.ntu.edu.tw/~cjlin/papers/libsvm.pdf : working set selection, shrinking and bias (section 4)
+# https://www.csie.ntu.edu.tw/~cjlin/papers/quadworkset.pdf : second order working set selection
+
+from warnings import warn
+
+from numpy import arange, argmax, argmin, full, inf, maximum, ones, where, zeros
+
+TAU = 1e-12
+# default maximal number of iterations : max(MAX_ITERATIONS, 100 * number of samples)
+MAX_ITERATIONS = 100000
+# kernels the smo solver does not support : the unscaled poly_kernel is so badly conditioned that the exact optimum
+# takes millions of iterations (scaling the kernel does not help, the problem is the same up to the bound C)
+UNSUPPORTED_KERNELS = ["poly_kernel"]
+
+
+def _kernel_row_provider(kernel, features):
+    """
+    Build the function computing on demand one row of the Gram matrix
+    :param kernel: kernel object returned by one of the Kernel static methods
+    :param features: array of features vectors
+    :return: function taking the index i and returning the array of kernel(features[i], features[t]) for every t
+    """
+    return lambda i: kernel.matrix(features[i:i + 1], features)[0]
+
+
+def _inactive(active, n_samples):
+    """
+    Complement of the active set
+    :param active: array of the indices in the active set
+    :param n_samples: total number of variables
+    :return: array of the indices not in the active set
+    """
+    mask = ones(n_samples, dtype=bool)
+    mask[active] = False
+    return arange(n_samples)[mask]
+
+
+def _reconstruct_gradient(kernel, features, labels, alpha, gradient, inactive, block_size=4096):
+    """
+    Recompute the gradient of the variables removed from the active set by the shrinking
+    :param kernel: kernel object returned by one of the Kernel static methods
+    :param features: array of features vectors
+    :param labels: array of labels (-1 | +1)
+    :param alpha: current Lagrange multipliers
+    :param gradient: gradient of the dual objective, updated in place
+    :param inactive: indices of the variables for which the gradient is outdated
+    :param block_size: number of variables recomputed at once
+    :return: None, the gradient is updated in place
+    """
+    support = alpha > 0
+    dual_coefficients = alpha[support] * labels[support]
+    for start in range(0, len(inactive), block_size):
+        block = inactive[start:start + block_size]
+        gradient[block] = labels[block] * kernel.matrix(features[block], features[support]).dot(dual_coefficients) - 1
+
+
+def _select_working_set(active, labels, alpha, gradient, diagonal, C, tolerance, get_row):
+    """
+    Select the pair of variables (i, j) to optimise with the second order information (WSS 2 of LIBSVM)
+    :return: tuple (i, j, row of i) or (-1, -1, None) if the active set is optimal within the tolerance
+    """
+    y, G, a, c = labels[active], gradient[active], alpha[active], C[active]
+    score = -y * G
+    up = ((y > 0) & (a < c)) | ((y < 0) & (a > 0))
+    low = ((y > 0) & (a > 0)) | ((y < 0) & (a < c))
+    if not up.any() or not low.any():
+        return -1, -1, None
+
+    local_i = argmax(where(up, score, -inf))
+    m = score[local_i]
+    if m - score[low].min() < tolerance:
+        return -1, -1, None
+
+    i = active[local_i]
+    row_i = get_row(i)
+    b = m - score
+    quadratic = diagonal[i] + diagonal[active] - 2 * row_i[active]
+    quadratic = where(quadratic > 0, quadratic, TAU)
+    candidates = low & (b > 0)
+    local_j = argmin(where(candidates, -(b ** 2) / quadratic, inf))
+    return i, active[local_j], row_i
+
+
+def _update_pair(i, j, labels, alpha, gradient, diagonal, row_i, row_j, C):
+    """
+    Analytically solve the sub problem on the pair (i, j) and clip it to the box [0, C[i]] x [0, C[j]] (as in LIBSVM)
+    :return: tuple of the variations of alpha[i] and alpha[j]
+    """
+    old_i, old_j = alpha[i], alpha[j]
+    quadratic = max(diagonal[i] + diagonal[j] - 2 * row_i[j], TAU)
+    if labels[i] != labels[j]:
+        delta = (-gradient[i] - gradient[j]) / quadratic
+        diff = old_i - old_j
+        alpha_i, alpha_j = old_i + delta, old_j + delta
+        if diff > 0 and alpha_j < 0:
+            alpha_j, alpha_i = 0, diff
+        elif diff <= 0 and alpha_i < 0:
+            alpha_i, alpha_j = 0, -diff
+        if diff > C[i] - C[j] and alpha_i > C[i]:
+            alpha_i, alpha_j = C[i], C[i] - diff
+        elif diff <= C[i] - C[j] and alpha_j > C[j]:
+            alpha_j, alpha_i = C[j], C[j] + diff
+    else:
+        delta = (gradient[i] - gradient[j]) / quadratic
+        total = old_i + old_j
+        alpha_i, alpha_j = old_i - delta, old_j + delta
+        if total > C[i] and alpha_i > C[i]:
+            alpha_i, alpha_j = C[i], total - C[i]
+        elif total <= C[i] and alpha_j < 0:
+            alpha_j, alpha_i = 0, total
+        if total > C[j] and alpha_j > C[j]:
+            alpha_j, alpha_i = C[j], total - C[j]
+        elif total <= C[j] and alpha_i < 0:
+            alpha_i, alpha_j = 0, total
+    alpha[i], alpha[j] = alpha_i, alpha_j
+    return alpha_i - old_i, alpha_j - old_j
+
+
+def _shrink(active, labels, alpha, gradient, C):
+    """
+    Remove from the active set the variables stuck at a bound that are not likely to move anymore
+    :return: tuple of the array of the indices kept in the active set and the current optimality gap
+    """
+    y, G, a, c = labels[active], gradient[active], alpha[active], C[active]
+    score = -y * G
+    up = ((y > 0) & (a < c)) | ((y < 0) & (a > 0))
+    low = ((y > 0) & (a > 0)) | ((y < 0) & (a < c))
+    g_max_up = score[up].max() if up.any() else -inf
+    g_max_low = (-score[low]).max() if low.any() else -inf
+
+    at_upper, at_lower = a >= c, a <= 0
+    shrunk = (at_upper & (((y > 0) & (-G > g_max_up)) | ((y < 0) & (-G > g_max_low)))) | \
+             (at_lower & (((y > 0) & (G > g_max_low)) | ((y < 0) & (G > g_max_up))))
+    return active[~shrunk], g_max_up + g_max_low
+
+
+def _bias(labels, alpha, gradient, C):
+    """
+    Compute the bias of the decision function from the final gradient (rho of LIBSVM, b = -rho)
+    :return: float
+    """
+    yG = labels * gradient
+    free = (alpha > 0) & (alpha < C)
+    if free.any():
+        rho = yG[free].mean()
+    else:
+        upper_bound = ((alpha >= C) & (labels < 0)) | ((alpha <= 0) & (labels > 0))
+        lower_bound = ~upper_bound
+        rho = (yG[upper_bound].min(initial=inf) + yG[lower_bound].max(initial=-inf)) / 2
+    return -float(rho)
+
+
+def smo(kernel, features, labels, C=None, tolerance=1e-3, max_iterations=None, shrinking=True, get_row=None,
+        sample_weight=None):
+    """
+    Sequential Minimal Optimization of the SVM dual problem. Only two rows of the Gram matrix are needed at each
+    iteration, so the memory stays linear in the number of samples.
+    :param kernel: kernel object returned by one of the Kernel static methods
+    :param features: array of features vectors
+    :param labels: array of labels (-1 | +1)
+    :param C: upper bound of the Lagrange multipliers, a float or an array with one bound per sample. The features
+    vectors overlap a lot between the classes so the hard margin problem has no finite solution : C = 1 is used when
+    None is given
+    :param tolerance: stopping criterion on the maximal violating pair
+    :param max_iterations:
+        (optional) maximal number of iterations, a warning is raised when it is reached
+        (default) max(MAX_ITERATIONS, 100 * number of samples)
+    :param shrinking: whether to remove the bounded variables from the active set during the optimisation
+    :param get_row:
+        (optional) function returning the row i of the Gram matrix (for example from a kernel cache)
+        (default) the row is computed each time it is needed
+    :param sample_weight:
+        (optional) array of weights multiplying the upper bound C of each sample
+        (default) every sample has the same upper bound C
+    :return: tuple of the array of Lagrange multipliers and the bias
+    """
+    if kernel.name in UNSUPPORTED_KERNELS:
+        raise ValueError("smo : the {} is not supported, use the cvxopt solver".format(kernel.name))
+    features = features.astype(float)
+    labels = labels.astype(float)
+    n_samples = len(labels)
+    if C is None:
+        C = 1.0
+    C = full(n_samples, C, dtype=float)
+    if sample_weight is not None:
+        C *= sample_weight
+    if max_iterations is None:
+        max_iterations = max(MAX_ITERATIONS, 100 * n_samples)
+    if get_row is None:
+        get_row = _kernel_row_provider(kernel, features)
+
+    diagonal = kernel.diagonal(features)
+    alpha = zeros(n_samples)
+    gradient = -ones(n_samples)
+    active = arange(n_samples)
+    unshrunk = False
+    counter = min(n_samples, 1000) + 1
+
+    for _ in range(max_iterations):
+        if shrinking:
+            counter -= 1
+            if not counter:
+                counter = min(n_samples, 1000)
+                active, gap = _shrink(active, labels, alpha, gradient, C)
+                if not unshrunk and gap <= 10 * tolerance:
+                    # close to the optimum : check once the whole problem before going on
+                    unshrunk = True
+                    _reconstruct_gradient(kernel, features, labels, alpha, gradient, _inactive(active, n_samples))
+                    active = arange(n_samples)
+
+        i, j, row_i = _select_working_set(active, labels, alpha, gradient, diagonal, C, tolerance, get_row)
+        if i == -1:
+            if len(active) == n_samples:
+                break
+            # the active set is optimal : check the optimality on the whole problem
+            _reconstruct_gradient(kernel, features, labels, alpha, gradient, _inactive(active, n_samples))
+            active = arange(n_samples)
+            counter = 1
+            i, j, row_i = _select_working_set(active, labels, alpha, gradient, diagonal, C, tolerance, get_row)
+            if i == -1:
+                break
+
+        row_j = get_row(j)
+        delta_i, delta_j = _update_pair(i, j, labels, alpha, gradient, diagonal, row_i, row_j, C)
+        gradient[active] += labels[active] * (labels[i] * row_i[active] * delta_i +
+                                              labels[j] * row_j[active] * delta_j)
+    else:
+        warn("smo : maximal number of iterations ({}) reached before the tolerance".format(max_iterations),
+             RuntimeWarning)
+
+    if len(active) < n_samples:
+        _reconstruct_gradient(kernel, features, labels, alpha, gradient, _inactive(active, n_samples))
+
+    return maximum(alpha, 0), _bias(labels, alpha, gradient, C)
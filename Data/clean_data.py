@@ -1,7 +1,25 @@
 # http://www.lextek.com/manuals/onix/stopwords1.html : english stop words
 # https://www.ranks.nl/stopwords/french : french stop words
 
-from re import escape, match, sub
+from hashlib import sha256
+from re import compile, sub
+
+# elements that are not relevant : mentions and urls
+_IRRELEVANT_ELEMENT = compile(rb'@\w|http.')
+# repetition of the same alphabetic character
+_REPETITION = compile(rb'(\w)\1+')
+# characters removed from the elements : the '#' and all the punctuations
+_REMOVED_CHARACTERS = b'#' + """~"'([-|`\\_^@)]=}/*-+.$£¨*!:/;,? """.encode()
+# same characters, except the whitespace separating the elements of a text
+_REMOVED_CHARACTERS_TEXT = _REMOVED_CHARACTERS.replace(b" ", b"")
+
+
+def cleaning_rules_hash():
+    """
+    Content hash of the cleaning rules, to detect the texts (or vectors) cleaned with other rules
+    :return: hexadecimal SHA-256 hash of the rules
+    """
+    return sha256(b'\0'.join([_IRRELEVANT_ELEMENT.pattern, _REPETITION.pattern, _REMOVED_CHARACTERS])).hexdigest()
 
 
 def clean_end_line(text):
@@ -13,47 +31,26 @@ def clean_end_line(text):
     return sub(rb'(.*)\1\n|\r|\r\n', rb'\1', text)
 
 
-def _clean_element(element, stop_words):
-    """
-    Remove all the undesired stuff from the element including stop words in the correct language
-    :param element: string representing an element (between whitespaces) from the tweet
-    :param stop_words: list of stop word in the desired language
-    :return: None or String
-        None if the element is not relevant
-        String containing the element cleaned
-    """
-    element = element.lower()
-
-    # if it is a mention or an url we don't need the element
-    if match(rb'@\w+', element) or match(rb'http.+', element):
-        return None
-
-    # remove the '#' from the element
-    element = sub(rb'#', rb'', element)
-
-    # remove all the punctuations in the element
-    element = sub(rb'[%s]+' % escape("""~"'([-|`\_^@)]=}/*-+.$£¨*!:/;,? """.encode()), rb'', element)
-
-    # remove all repetition (more than twice) of the same alphabetic character
-    element = sub(rb'(\w)\1+', rb'\1\1', element)
-
-    # check whether the element is relevant or not
-    if element in stop_words:
-        return None
-    else:
-        return element
-
-
 def clean_text(text, stop_words):
     """
     Clean the text from all undesired elements including the stop words in the desired language
     :param text: string to transform in a cleaned list of element
-    :param stop_words: list of stop words in the correct language
+    :param stop_words: set (or list) of stop words in the correct language
     :return: list of relevant and cleaned element from the text
     """
-    list_cleaned_element = list()
-    for element in text.split(rb" "):
-        cleaned_element = _clean_element(element, stop_words)
-        if cleaned_element:
-            list_cleaned_element.append(cleaned_element)
-    return list_cleaned_element
+    # the mentions and urls are dropped first, then the other elements are cleaned all at once : the whitespace is
+    # neither removed nor a repeatable character, so the elements stay separated
+    text = b" ".join(element for element in text.lower().split(b" ")
+                     if not (element.startswith((b"@", b"http")) and _IRRELEVANT_ELEMENT.match(element)))
+    text = _REPETITION.sub(rb'\1\1', text.translate(None, _REMOVED_CHARACTERS_TEXT))
+    return [element for element in text.split(b" ") if element and element not in stop_words]
+
+
+def clean_texts(l_text, stop_words):
+    """
+    Clean multiple texts at once
+    :param l_text: iterable of strings to transform in cleaned lists of element
+    :param stop_words: set (or list) of stop words in the correct language
+    :return: list containing the list of relevant and cleaned element of each text
+    """
+    return [clean_text(text, stop_words) for text in l_text]
@@ -1,13 +1,24 @@
-from json import loads
-from secrets import randbelow
+from io import BytesIO
+from itertools import islice
+from multiprocessing import Pool
+from mmap import ACCESS_READ, mmap
+from os.path import getmtime, getsize, isfile
 
-from numpy import array
+from numpy import (append, array, concatenate, cumsum, flatnonzero, frombuffer, int8, int16, int64, load, minimum,
+                   save, searchsorted, uint8)
 
-from Classifier.features import characteristic_vector
-from Data.clean_data import clean_end_line, clean_text
-from Ressources.resource import get_correct_stop_word
-from Ressources.resource import get_path_resource
+from Classifier.features import characteristic_matrix, feature_hashes
+from Data.clean_data import clean_end_line
+from Data.feature_store import (convert_features_labels_json, load_manifest, load_strata, sample_feature_store,
+                                save_manifest, save_shard, stale_shards)
+from Data.sampling import get_generator, reservoir_sample, sample_elements, sample_strata, strata_sizes
+from Ressources.resource import Resource, get_path_resource
 
+DATA_SET_FILES = ['Sentiment_analysis_dataset_1.csv', 'Sentiment_analysis_dataset_2.csv']
+# stratified index of the data set : lines of the tweets of label 0 and of label 1
+DATA_SET_STRATA = 'Sentiment_analysis_dataset.rows_label_{}.npy'
+# newly labelled tweets added after the data set, same format as the data set
+APPENDED_TWEETS_FILE = 'Sentiment_analysis_dataset_appended.csv'
 NB_TWEETS_PER_FILE = 789314
 NB_NON_NULL_VECTORS = 808850
 NB_TOTAL_POSITIVE_TWEETS = 790185
@@ -29,22 +40,114 @@ def clean_line(line):
     return label.split(b',')[1], clean_end_line(text)
 
 
-def _get_lines_file(number_line, file):
+def _path_line_index(name_file):
     """
-    Collect the desired amount of line in the file
-    :param number_line: total number of lines to collect from the file
-    :param file: file object separated by line
-    :return: list of tuple containing the labelled of the text and the text of the tweet
+    Paths of the line index of a file of the data set
+    :param name_file: name of the CSV file of the data set
+    :return: tuple of the paths of the offsets and of the labels of the lines
     """
-    count_lines, list_tweets = 0, list()
-    for line in file:
-        count_lines += 1
-        list_tweets.append(clean_line(line))
-        number_line -= 1
-        if not number_line:
-            break
+    return get_path_resource(name_file + '.offsets.npy'), get_path_resource(name_file + '.labels.npy')
 
-    return count_lines, list_tweets
+
+def build_line_index(name_file):
+    """
+    Index the lines of a file of the data set : the offset of the beginning of each line (and of the end of the file)
+    and the label of each line (-1 when the line is not a labelled tweet, like the header)
+    :param name_file: name of the CSV file of the data set
+    :return: tuple of the arrays of the offsets and of the labels
+    """
+    with open(get_path_resource(name_file), 'rb') as file_part:
+        with mmap(file_part.fileno(), 0, access=ACCESS_READ) as content:
+            data = frombuffer(content, dtype=uint8)
+            offsets = concatenate(([0], flatnonzero(data == ord('\n')) + 1))
+            if offsets[-1] != len(data):
+                offsets = append(offsets, len(data))
+
+            # the label is the character following the first comma of the line
+            commas = append(flatnonzero(data == ord(',')), len(data))
+            first_commas = commas[searchsorted(commas, offsets[:-1])]
+            positions = minimum(first_commas + 1, len(data) - 1)
+            labels = data[positions].astype(int16) - ord('0')
+            labels[(positions >= offsets[1:]) | ((labels != 0) & (labels != 1))] = -1
+            labels = labels.astype(int8)
+            del data
+
+    path_offsets, path_labels = _path_line_index(name_file)
+    save(path_offsets, offsets.astype(int64))
+    save(path_labels, labels)
+    return offsets, labels
+
+
+def _load_line_index(name_file):
+    """
+    Load the line index of a file of the data set, built the first time or again when the file changed
+    :param name_file: name of the CSV file of the data set
+    :return: tuple of the arrays of the offsets (memory-mapped) and of the labels
+    """
+    path_offsets, path_labels = _path_line_index(name_file)
+    if not isfile(path_labels) or getmtime(path_labels) < getmtime(get_path_resource(name_file)):
+        build_line_index(name_file)
+    return load(path_offsets, mmap_mode='r'), load(path_labels)
+
+
+class DataSetReader(object):
+
+    def __init__(self):
+        """
+        Read any line of the data set by its index (both files one after the other), from the memory-mapped CSV files
+        and their line index, without loading the whole data set
+        """
+        self.files, self.contents, self.offsets, l_labels = list(), list(), list(), list()
+        for name_file in DATA_SET_FILES:
+            offsets, labels = _load_line_index(name_file)
+            file_part = open(get_path_resource(name_file), 'rb')
+            self.files.append(file_part)
+            self.contents.append(mmap(file_part.fileno(), 0, access=ACCESS_READ))
+            self.offsets.append(offsets)
+            l_labels.append(labels)
+        # index of the first line of each file
+        self.starts = cumsum([0] + [len(labels) for labels in l_labels])
+        self.labels = concatenate(l_labels)
+        # stratified index : lines of the tweets of label 0 and of label 1 in the whole data set
+        self.strata = load_strata([get_path_resource(DATA_SET_STRATA.format(label)) for label in [0, 1]], self.labels,
+                                  [_path_line_index(name_file)[1] for name_file in DATA_SET_FILES])
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def line(self, index):
+        """
+        Read a line of the data set
+        :param index: index of the line in the whole data set
+        :return: bytes of the line (with its ending characters, like readlines)
+        """
+        part = searchsorted(self.starts, index, side='right') - 1
+        index -= self.starts[part]
+        return self.contents[part][self.offsets[part][index]:self.offsets[part][index + 1]]
+
+    def lines(self, indexes):
+        """
+        Read multiple lines of the data set
+        :param indexes: iterable of indexes of lines in the whole data set
+        :return: list of bytes of the lines, in the order of the indexes
+        """
+        return [self.line(index) for index in indexes]
+
+    def close(self):
+        """
+        Release the memory-mapped files
+        :return:
+        """
+        for content, file_part in zip(self.contents, self.files):
+            content.close()
+            file_part.close()
+        self.contents, self.files = list(), list()
 
 
 def get_some_sample(number_tweets=12):
@@ -55,17 +158,8 @@ def get_some_sample(number_tweets=12):
     """
     # data set csv file : ItemID,Sentiment,SentimentSource,SentimentText
     number_tweets = min(number_tweets, 2 * NB_TWEETS_PER_FILE)
-    with open(get_path_resource('Sentiment_analysis_dataset_1.csv'), 'rb') as file_part1:
-        number_lines, sample_list = _get_lines_file(number_tweets, file_part1)
-        if number_tweets - number_lines:
-            with open(get_path_resource('Sentiment_analysis_dataset_2.csv'), 'rb') as file_part2:
-                number_lines_2, sample_list_2 = _get_lines_file(number_tweets - number_lines, file_part2)
-                if number_tweets - (number_lines + number_lines_2):
-                    return NB_TWEETS_PER_FILE * 2, sample_list + sample_list_2
-                else:
-                    return number_tweets, sample_list + sample_list_2
-
-    return number_tweets, sample_list
+    sample_list = list(islice(iter_dataset(), number_tweets))
+    return len(sample_list), sample_list
 
 
 def get_positive_tweets(sample_list):
@@ -104,46 +198,45 @@ def get_positive_negative_tweets(sample_list):
     return negative, positive
 
 
-def get_randomised_sample(number_tweets=12):
+def get_randomised_sample(number_tweets=12, seed=None):
     """
     Get some random tweets from the whole data set
     :param number_tweets: Number of tweets to collect up to the total number of tweets
+    :param seed: (optional) seed of the random generator, to draw the same sample again
     :return: sample_list containing the line from the data set
     """
-    number_tweets = min(number_tweets, 2 * NB_TWEETS_PER_FILE)
-    sample_list = list()
-    with open(get_path_resource('Sentiment_analysis_dataset_1.csv'), 'rb') as file_part1:
-        with open(get_path_resource('Sentiment_analysis_dataset_2.csv'), 'rb') as file_part2:
-            global_file = file_part1.readlines() + file_part2.readlines()
-            while number_tweets:
-                sample_list.append(clean_line(global_file.pop(randbelow(len(global_file)))))
-                number_tweets -= 1
-    return sample_list
+    with DataSetReader() as reader:
+        indexes = sample_elements(flatnonzero(reader.labels >= 0), number_tweets, get_generator(seed))
+        return [clean_line(line) for line in reader.lines(indexes)]
 
 
-def get_randomised_pos_neg_sample(num_pos=12, num_neg=12):
+def get_streaming_randomised_sample(number_tweets=12, seed=None):
+    """
+    Get some random tweets from the whole data set in a single pass over the files, without their line index (reservoir
+    sampling : only the sample is kept in memory)
+    :param number_tweets: Number of tweets to collect up to the total number of tweets
+    :param seed: (optional) seed of the random generator, to draw the same sample again
+    :return: sample_list containing the line from the data set
+    """
+    return [clean_line(line) for line in reservoir_sample(_read_data_set_lines(), number_tweets, get_generator(seed))]
+
+
+def get_randomised_pos_neg_sample(num_pos=12, num_neg=12, seed=None):
     """
     Get two lists of negative and positive texts from the labelled tweets in the whole data set up to the number of
     positive and negative tweets contained in the data set
     :param num_pos: number of positive tweets to collect up to the total number of positive tweets in the data set
     :param num_neg: number of negative tweets to collect up to the total number of negative tweets in the data set
+    :param seed: (optional) seed of the random generator, to draw the same sample again
     :return: 2 lists containing negative texts and positive texts from the tweets in the data set
     """
-    num_pos = min(num_pos, NB_TOTAL_POSITIVE_TWEETS)
-    num_neg = min(num_neg, NB_TOTAL_NEGATIVE_TWEETS)
-    positives, negatives = list(), list()
-    with open(get_path_resource('Sentiment_analysis_dataset_1.csv'), 'rb') as file_part1:
-        with open(get_path_resource('Sentiment_analysis_dataset_2.csv'), 'rb') as file_part2:
-            global_file = file_part1.readlines() + file_part2.readlines()
-            while num_pos or num_neg:
-                element = clean_line(global_file.pop(randbelow(len(global_file))))
-                if element[0] == b'1' and num_pos:
-                    positives.append(element[1])
-                    num_pos -= 1
-                elif num_neg:
-                    negatives.append(element[1])
-                    num_neg -= 1
-    return negatives, positives
+    generator = get_generator(seed)
+    with DataSetReader() as reader:
+        result = list()
+        for stratum, number in zip(reader.strata, [num_neg, num_pos]):
+            indexes = sample_elements(stratum, number, generator)
+            result.append([clean_line(line)[1] for line in reader.lines(indexes)])
+    return result[0], result[1]
 
 
 def _count_pos_neg_sample():
@@ -151,20 +244,13 @@ def _count_pos_neg_sample():
     Method to compute the number of positive and negative sample contained in our data set
     :return: None, print the number of negative tweets, positive tweets and total tweets counted
     """
-    count_pos, count_neg, number_tweets = 0, 0, 2 * NB_TWEETS_PER_FILE - 1
-    with open(get_path_resource('Sentiment_analysis_dataset_1.csv'), 'rb') as file_part1:
-        with open(get_path_resource('Sentiment_analysis_dataset_2.csv'), 'rb') as file_part2:
-            global_file = file_part1.readlines() + file_part2.readlines()
-            while number_tweets:
-                number_tweets -= 1
-                if global_file.pop().split(b',Sentiment140,')[0].split(b',')[1] == b'1':
-                    count_pos += 1
-                else:
-                    count_neg += 1
+    with DataSetReader() as reader:
+        count_neg, count_pos = len(reader.strata[0]), len(reader.strata[1])
     print(count_neg, count_pos, count_neg + count_pos)
 
 
-def get_characteristic_label_vectors(nb, randomness, pos_equal_neg, Resource, keep_null_vector=False, language='en'):
+def get_characteristic_label_vectors(nb, randomness, pos_equal_neg, Resource, keep_null_vector=False, language='en',
+                                     seed=None, positive_ratio=None):
     """
     Collect the desired number of label vectors regarding the parameters given. Provide 2 booleans to get a
     collection randomised or not and equal in number of positive and negative vector, or not.
@@ -174,63 +260,279 @@ def get_characteristic_label_vectors(nb, randomness, pos_equal_neg, Resource, ke
     :param Resource: class object containing all the resources (positive words, negative words, positive emoticons,
     negative emoticons, stop words)
     :param keep_null_vector: False or True
-        False : if we only want non null vector
+        False : if we only want non null vector, read from the feature store (a ValueError is raised if it was computed
+        with other resources or another language, see refresh_feature_store)
         True : if we want tweets only, with the corresponding eventually null vector
     :param language: Choose the language from french to english
         'fr' | 'en'
+    :param seed: (optional) seed of the random generator, to draw the same collection again (reproducible profiles)
+    :param positive_ratio: (optional) share of positive vectors in the collection, when pos_equal_neg is False
     :return: tuple of array containing the features vectors and labels vectors corresponding
     """
-    m_features, m_labels = list(), list()
-    nb_pos, nb_neg, nb_tweet = 0, 0, 0
+    generator = get_generator(seed)
     if keep_null_vector:
-        nb = min(nb, NB_TWEETS_PER_FILE * 2)
-        with open(get_path_resource('Sentiment_analysis_dataset_1.csv'), 'rb') as file_part1:
-            with open(get_path_resource('Sentiment_analysis_dataset_2.csv'), 'rb') as file_part2:
-                global_file = file_part1.readlines() + file_part2.readlines()
-                while nb_tweet < nb:
-                    if randomness:
-                        label, text = clean_line(global_file.pop(randbelow(len(global_file))))
-                    else:
-                        label, text = clean_line(global_file.pop())
-                    feature_vector = characteristic_vector(clean_text(text, get_correct_stop_word(Resource, language)),
-                                                           Resource)
-                    float_label = float(label)
-                    if pos_equal_neg:
-                        if float_label == 0.0 and nb_neg < nb // 2 or float_label == 1.0 and nb_pos < nb // 2:
-                            m_features.append(feature_vector)
-                            m_labels.append(float_label)
-                            nb_tweet += 1
-                            if float(label) == 1.0:
-                                nb_pos += 1
-                            else:
-                                nb_neg += 1
-                    else:
-                        m_features.append(feature_vector)
-                        m_labels.append(float_label)
-                        nb_tweet += 1
+        with DataSetReader() as reader:
+            # the stratified samples are drawn directly from the lines of each label, the others from all the tweets
+            sizes = strata_sizes(nb, pos_equal_neg, positive_ratio)
+            if sizes is None:
+                strata, sizes = [flatnonzero(reader.labels >= 0)], [nb]
+            else:
+                strata = reader.strata
+            # the non randomised collection is read from the end of the data set
+            indexes = sample_strata(strata, sizes, randomness, generator, reverse=True)
+            l_line = [clean_line(line) for line in reader.lines(indexes)]
+        m_labels = [float(label) for label, _ in l_line]
+        # the selected tweets are cleaned and counted all at once
+        m_features = characteristic_matrix([text for _, text in l_line], Resource, language)
     else:
-        nb = min(nb, NB_NON_NULL_VECTORS)
-        with open(get_path_resource('Features_labels_dataset.json'), 'r') as f_l_file:
-            global_file = loads(f_l_file.read())
-            while nb_tweet < nb:
-                if randomness:
-                    index = randbelow(len(global_file["vectors"]))
-                else:
-                    index = 0
-                label = float(global_file["labels"].pop(index))
-                if pos_equal_neg and nb_pos < nb // 2 and label == 1.0:
-                    m_features.append(global_file["vectors"].pop(index))
-                    m_labels.append(label)
-                    nb_tweet += 1
-                    nb_pos += 1
-                elif pos_equal_neg and nb_neg < nb // 2 and label == 0.0:
-                    m_features.append(global_file["vectors"].pop(index))
-                    m_labels.append(label)
-                    nb_tweet += 1
-                    nb_neg += 1
-                elif not pos_equal_neg:
-                    m_features.append(global_file["vectors"].pop(index))
-                    m_labels.append(label)
-                    nb_tweet += 1
+        # the vectors of the store must have been computed with the same resources (see refresh_feature_store)
+        m_features, m_labels = sample_feature_store(nb, randomness, pos_equal_neg, generator, positive_ratio,
+                                                    feature_hashes(Resource, language))
 
     return array(m_features), array(m_labels)
+
+
+def _read_data_set_lines():
+    """
+    Read the lines of the tweets of both parts of the data set, one after the other (without the header)
+    :return: generator of the lines of the data set
+    """
+    for name_file in DATA_SET_FILES:
+        with open(get_path_resource(name_file), 'rb') as file_part:
+            for line in file_part:
+                if not line.startswith(b'ItemID,'):
+                    yield line
+
+
+def _split_line(line):
+    """
+    Split a line of the data set in its fields
+    :param line: line extracted from the data set, 'Number_line,label_sentiment,source,text_tweet'
+    :return: tuple containing the label, the source and the raw text of the tweet
+    """
+    _, label, source, text = line.split(b',', 3)
+    return label, source, text
+
+
+def iter_dataset(label=None, source=None):
+    """
+    Read the tweets of the whole data set lazily, line by line across both parts of the data set : a tweet is only
+    parsed when it is consumed and nothing is kept in memory
+    :param label:
+        (optional) only the tweets of this label 0 | 1
+        (default) the tweets of both labels
+    :param source:
+        (optional) only the tweets from this source 'Sentiment140' | 'Kaggle'
+        (default) the tweets of both sources
+    :return: generator of tuples containing the label and the text of the tweets
+    """
+    if label is not None:
+        label = b'%d' % int(label)
+    if isinstance(source, str):
+        source = source.encode()
+    for line in _read_data_set_lines():
+        line_label, line_source, text = _split_line(line)
+        if (label is None or line_label == label) and (source is None or line_source == source):
+            yield line_label, clean_end_line(text)
+
+
+def iter_dataset_chunks(chunk_size=10000, label=None, source=None):
+    """
+    Read the tweets of the whole data set lazily by chunks of fixed size, only one chunk is kept in memory at a time
+    :param chunk_size: number of tweets per chunk, the last chunk can be smaller
+    :param label: (optional) only the tweets of this label, see iter_dataset
+    :param source: (optional) only the tweets from this source, see iter_dataset
+    :return: generator of lists of tuples containing the label and the text of the tweets
+    """
+    rows = iter_dataset(label, source)
+    chunk = list(islice(rows, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(rows, chunk_size))
+
+
+def data_set_ranges(nb_lines=100000, l_name_file=None):
+    """
+    Split the files of the data set in byte ranges of whole lines, using the line index of each file
+    :param nb_lines: number of lines per range, the last range of each file can be smaller
+    :param l_name_file:
+        (optional) list of the names of the CSV files to split
+        (default) the files of the data set
+    :return: list of tuples (name of the CSV file, offset of the beginning, offset of the end) of the ranges, in the order
+    of the files
+    """
+    if l_name_file is None:
+        l_name_file = DATA_SET_FILES
+    ranges = list()
+    for name_file in l_name_file:
+        offsets, _ = _load_line_index(name_file)
+        bounds = append(offsets[:-1][::nb_lines], offsets[-1])
+        ranges += [(name_file, int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:])]
+    return ranges
+
+
+def featurize_range(name_file, start, end, Resource, language='en'):
+    """
+    Compute the non null characteristic vectors of the tweets of a byte range of a file of the data set
+    :param name_file: name of the CSV file of the data set
+    :param start: offset of the beginning of the range (beginning of a line)
+    :param end: offset of the end of the range (beginning of a line or end of the file)
+    :param Resource: class object containing all the resources (positive words, negative words, positive emoticons,
+    negative emoticons, stop words)
+    :param language: Choose the language from french to english
+        'fr' | 'en'
+    :return: tuple of array containing the features vectors and labels vectors corresponding
+    """
+    with open(get_path_resource(name_file), 'rb') as file_part:
+        file_part.seek(start)
+        lines = BytesIO(file_part.read(end - start))
+    l_label, l_text = list(), list()
+    for line in lines:
+        if not line.startswith(b'ItemID,'):
+            label, _, text = _split_line(line)
+            l_label.append(float(label))
+            l_text.append(clean_end_line(text))
+    features, labels = characteristic_matrix(l_text, Resource, language), array(l_label)
+    non_null = features.any(axis=1)
+    return features[non_null], labels[non_null]
+
+
+def _featurize_shard_job(job):
+    """
+    Compute the characteristic vectors of a byte range of the data set and save them as a shard of the feature store,
+    in a worker process
+    :param job: tuple (number of the shard, name of the CSV file, offset of the beginning, offset of the end, Resource,
+    language)
+    :return: dictionary describing the shard in the manifest, with the content hashes of the resources used
+    """
+    index, name_file, start, end, Resource, language = job
+    shard = save_shard(index, *featurize_range(name_file, start, end, Resource, language))
+    shard.update({"file": name_file, "start": start, "end": end, "hashes": feature_hashes(Resource, language)})
+    return shard
+
+
+def _featurize_shards(jobs, processes=None):
+    """
+    Run the jobs computing the shards of the feature store in a pool of processes
+    :param jobs: list of the jobs (see _featurize_shard_job)
+    :param processes:
+        (optional) number of worker processes, 1 to featurize in the current process
+        (default) number of cores
+    :return: list of the dictionaries describing the shards, in the order of the jobs
+    """
+    if processes == 1:
+        return list(map(_featurize_shard_job, jobs))
+    with Pool(processes) as pool:
+        return pool.map(_featurize_shard_job, jobs)
+
+
+def build_feature_store(Resource, nb_lines=100000, language='en', processes=None):
+    """
+    Compute the non null characteristic vectors of the whole data set (and of the appended tweets) and save them with
+    their labels in the binary feature store (used by get_characteristic_label_vectors). The data set is split in byte
+    ranges, each range is featurized in a pool of processes and saved as its own shard, the manifest listing the shards
+    is written at the end.
+    :param Resource: class object containing all the resources (positive words, negative words, positive emoticons,
+    negative emoticons, stop words)
+    :param nb_lines: number of lines of the data set per shard
+    :param language: Choose the language from french to english
+        'fr' | 'en'
+    :param processes:
+        (optional) number of worker processes, 1 to featurize in the current process
+        (default) number of cores
+    :return: number of vectors saved
+    """
+    l_name_file = DATA_SET_FILES + [name_file for name_file in [APPENDED_TWEETS_FILE]
+                                    if isfile(get_path_resource(name_file))]
+    jobs = [(index, name_file, start, end, Resource, language)
+            for index, (name_file, start, end) in enumerate(data_set_ranges(nb_lines, l_name_file))]
+    shards = _featurize_shards(jobs, processes)
+    save_manifest(shards, language=language)
+    return sum(shard["rows"] for shard in shards)
+
+
+def refresh_feature_store(Resource, language='en', processes=None):
+    """
+    Compute again only the shards of the feature store built with other resources (lexicons, stop words, language,
+    cleaning rules) than the current ones, the other shards are kept as they are. To be called explicitly after a change
+    of the resources : the samplers only check the store and refuse the stale shards.
+    :param Resource: class object containing all the resources (positive words, negative words, positive emoticons,
+    negative emoticons, stop words)
+    :param language: Choose the language from french to english
+        'fr' | 'en'
+    :param processes:
+        (optional) number of worker processes, 1 to featurize in the current process
+        (default) number of cores
+    :return: number of shards computed again
+    """
+    manifest = load_manifest()
+    shards = manifest.pop("shards")
+    stale = stale_shards(shards, feature_hashes(Resource, language))
+    if stale:
+        jobs = [(position, shards[position]["file"], shards[position]["start"], shards[position]["end"], Resource,
+                 language) for position in stale]
+        for position, shard in zip(stale, _featurize_shards(jobs, processes)):
+            shards[position] = shard
+        manifest["language"] = language
+        save_manifest(shards, **manifest)
+    return len(stale)
+
+
+def append_tweets(l_label, l_text, Resource, language='en', source=b'Appended'):
+    """
+    Add newly labelled tweets : they are written at the end of their own CSV file (APPENDED_TWEETS_FILE) and their non
+    null characteristic vectors are saved as a new shard of the feature store, without rewriting the existing data
+    :param l_label: list of the labels of the tweets 0 | 1
+    :param l_text: list of the texts of the tweets
+    :param Resource: class object containing all the resources (positive words, negative words, positive emoticons,
+    negative emoticons, stop words)
+    :param language: Choose the language from french to english
+        'fr' | 'en'
+    :param source: source of the tweets written in the CSV file (see iter_dataset)
+    :return: number of vectors added to the feature store
+    """
+    path = get_path_resource(APPENDED_TWEETS_FILE)
+    start, nb_lines = 0, 0
+    if isfile(path):
+        start, nb_lines = getsize(path), len(_load_line_index(APPENDED_TWEETS_FILE)[1])
+    if isinstance(source, str):
+        source = source.encode()
+
+    lines = list()
+    for number, (label, text) in enumerate(zip(l_label, l_text), nb_lines):
+        if isinstance(text, str):
+            text = text.encode()
+        # one tweet per line
+        lines.append(b'%d,%d,%s,%s\n' % (number, int(label), source, text.replace(b'\r', b' ').replace(b'\n', b' ')))
+    content = b''.join(lines)
+    with open(path, 'ab') as file_appended:
+        file_appended.write(content)
+
+    manifest = load_manifest()
+    shards = manifest.pop("shards")
+    shard = _featurize_shard_job((len(shards), APPENDED_TWEETS_FILE, start, start + len(content), Resource, language))
+    save_manifest(shards + [shard], **manifest)
+    return shard["rows"]
+
+
+if __name__ == '__main__':
+    # Build the binary feature store from the command line : 'python -m Data.dataset build'
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Build the binary feature store of the data set")
+    parser.add_argument("action", choices=["build", "refresh", "convert"],
+                        help="build : compute every shard, refresh : compute again the shards built with other "
+                             "resources, convert : convert the former JSON file of the vectors")
+    parser.add_argument("--language", choices=["en", "fr"], default="en")
+    parser.add_argument("--processes", type=int, default=None, help="number of worker processes (default : cores)")
+    parser.add_argument("--nb-lines", type=int, default=100000, help="number of lines of the data set per shard")
+    arguments = parser.parse_args()
+
+    if arguments.action == "build":
+        print("{} vectors saved".format(build_feature_store(Resource(), arguments.nb_lines, arguments.language,
+                                                            arguments.processes)))
+    elif arguments.action == "refresh":
+        print("{} shards computed again".format(refresh_feature_store(Resource(), arguments.language,
+                                                                      arguments.processes)))
+    else:
+        print("{} vectors saved".format(convert_features_labels_json()))
@@ -0,0 +1,249 @@
+from json import dumps, loads
+from os import remove
+from os.path import getmtime, isfile
+
+from numpy import (argsort, asarray, concatenate, cumsum, empty, flatnonzero, iinfo, int8, int16, int64, load,
+                   result_type, save, searchsorted, sort, unique)
+
+from Data.sampling import first_elements, get_generator, sample_indexes, sample_strata, strata_sizes
+from Ressources.resource import get_path_resource
+
+# binary store of the non null characteristic vectors of the data set and of their labels, split in shards (one .npy
+# file of vectors and one of labels per shard) listed in order by the manifest
+FEATURES_SHARD = 'Features_dataset_{}.npy'
+LABELS_SHARD = 'Labels_dataset_{}.npy'
+MANIFEST_STORE = 'Features_dataset_manifest.json'
+# stratified index of the store : rows of the vectors of label 0 and of label 1
+STRATA_STORE = 'Rows_label_{}_dataset.npy'
+# former JSON file of the characteristic vectors and labels, converted to the store when there is no store yet
+FEATURES_LABELS_JSON = 'Features_labels_dataset.json'
+
+
+class ShardedArray(object):
+
+    def __init__(self, shards):
+        """
+        Read-only view of multiple arrays (the memory-mapped shards of the store) as a single array, concatenated
+        along the first axis without being copied
+        :param shards: list of arrays with the same number of columns
+        """
+        self.shards = shards
+        # index of the first row of each shard
+        self.starts = cumsum([0] + [len(shard) for shard in shards])
+        self.shape = (int(self.starts[-1]),) + (shards[0].shape[1:] if shards else ())
+        self.dtype = result_type(*shards) if shards else int8
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, indexes):
+        """
+        Read some rows, each shard is read once, in the order of the indexes when they are sorted
+        :param indexes: array of indexes of rows
+        :return: array of the rows, in the order of the indexes
+        """
+        indexes = asarray(indexes)
+        parts = searchsorted(self.starts, indexes, side='right') - 1
+        rows = empty((len(indexes),) + self.shape[1:], dtype=self.dtype)
+        for part in unique(parts):
+            in_part = parts == part
+            rows[in_part] = self.shards[part][indexes[in_part] - self.starts[part]]
+        return rows
+
+
+def save_shard(index, features, labels):
+    """
+    Write a shard of the binary feature store. The vectors are stored as int8 (int16 if a count does not fit) and the
+    labels as int8.
+    :param index: number of the shard
+    :param features: array of characteristic vectors
+    :param labels: array containing the labels of each characteristic vector
+    :return: dictionary describing the shard in the manifest (names of its files and number of rows)
+    """
+    if len(features) and (features.max() > iinfo(int8).max or features.min() < iinfo(int8).min):
+        features = features.astype(int16)
+    else:
+        features = features.astype(int8)
+    shard = {"features": FEATURES_SHARD.format(index), "labels": LABELS_SHARD.format(index), "rows": len(labels)}
+    save(get_path_resource(shard["features"]), features)
+    save(get_path_resource(shard["labels"]), asarray(labels).astype(int8))
+    return shard
+
+
+def save_manifest(shards, **information):
+    """
+    Write the manifest of the binary feature store, once all its shards are written, and build its stratified index.
+    The files of the shards of the previous store not listed anymore are removed.
+    :param shards: list of the dictionaries describing the shards (see save_shard), in the order of the store
+    :param information: other information on the store saved in the manifest (language, ...)
+    :return:
+    """
+    if isfile(get_path_resource(MANIFEST_STORE)):
+        # the files of the shards of the previous store which are not used anymore
+        names = {shard[kind] for shard in shards for kind in ["features", "labels"]}
+        for shard in load_manifest()["shards"]:
+            for kind in ["features", "labels"]:
+                if shard[kind] not in names and isfile(get_path_resource(shard[kind])):
+                    remove(get_path_resource(shard[kind]))
+
+    manifest = dict(information, shards=shards)
+    with open(get_path_resource(MANIFEST_STORE), 'w') as manifest_file:
+        manifest_file.write(dumps(manifest, indent=1))
+    labels = [load(get_path_resource(shard["labels"]), mmap_mode='r') for shard in shards]
+    build_strata([get_path_resource(STRATA_STORE.format(label)) for label in [0, 1]],
+                 concatenate(labels) if labels else empty(0, dtype=int8))
+
+
+def load_manifest():
+    """
+    Read the manifest of the binary feature store. A checkout with only the former JSON file of the vectors has its
+    store converted from it first.
+    :return: dictionary containing the list of the shards ("shards") and the other information on the store
+    """
+    if not isfile(get_path_resource(MANIFEST_STORE)):
+        if not isfile(get_path_resource(FEATURES_LABELS_JSON)):
+            raise FileNotFoundError("there is no feature store ({}) : build it with 'python -m Data.dataset build' (see "
+                                    "Data.dataset.build_feature_store)".format(MANIFEST_STORE))
+        convert_features_labels_json()
+    with open(get_path_resource(MANIFEST_STORE), 'r') as manifest_file:
+        return loads(manifest_file.read())
+
+
+def stale_shards(shards, hashes):
+    """
+    Find the shards of the store computed with other resources than the current ones. The shards without recorded
+    hashes (converted from another format) can not be checked and are never stale.
+    :param shards: list of the dictionaries describing the shards (see load_manifest)
+    :param hashes: content hashes of the current resources (see Classifier.features.feature_hashes)
+    :return: list of the positions of the stale shards in the list
+    """
+    return [position for position, shard in enumerate(shards) if shard.get("hashes", hashes) != hashes]
+
+
+def save_feature_store(features, labels, **information):
+    """
+    Write the characteristic vectors and their labels in the binary feature store, as a single shard
+    :param features: array of characteristic vectors
+    :param labels: array containing the labels of each characteristic vector
+    :param information: other information on the store saved in the manifest (language, ...)
+    :return:
+    """
+    save_manifest([save_shard(0, features, labels)], **information)
+
+
+def convert_features_labels_json():
+    """
+    Convert the former JSON file of characteristic vectors and labels (Features_labels_dataset.json) to the binary
+    feature store, without computing the vectors again
+    :return: number of vectors saved
+    """
+    with open(get_path_resource(FEATURES_LABELS_JSON), 'r') as f_l_file:
+        global_file = loads(f_l_file.read())
+    save_feature_store(asarray(global_file["vectors"]), asarray([float(label) for label in global_file["labels"]]),
+                       language='en')
+    return len(global_file["labels"])
+
+
+def load_feature_store(hashes=None):
+    """
+    Open the binary feature store. The shards are memory-mapped (read-only) : only the vectors used are read.
+    :param hashes:
+        (optional) content hashes of the current resources (see Classifier.features.feature_hashes), a ValueError is
+        raised if some shards were computed with other resources
+        (default) the shards are not checked
+    :return: tuple of the vectors of all the shards (ShardedArray) and of the array of the labels
+    """
+    shards = load_manifest()["shards"]
+    if hashes is not None:
+        stale = stale_shards(shards, hashes)
+        if stale:
+            raise ValueError("{} of the {} shards of the feature store were computed with other resources (lexicons, "
+                             "stop words, language or cleaning rules), refresh_feature_store computes them again"
+                             .format(len(stale), len(shards)))
+    features = ShardedArray([load(get_path_resource(shard["features"]), mmap_mode='r') for shard in shards])
+    labels = [load(get_path_resource(shard["labels"]), mmap_mode='r') for shard in shards]
+    return features, concatenate(labels) if labels else empty(0, dtype=int8)
+
+
+def build_strata(l_path, labels):
+    """
+    Build and save the stratified index of an array of labels : the rows of label 0 and the rows of label 1
+    :param l_path: paths of the files of the rows of label 0 and of label 1
+    :param labels: array of labels
+    :return: list of the arrays of the rows of label 0 and of label 1
+    """
+    strata = list()
+    for label, path in enumerate(l_path):
+        strata.append(flatnonzero(asarray(labels) == label).astype(int64))
+        save(path, strata[-1])
+    return strata
+
+
+def load_strata(l_path, labels, l_path_reference):
+    """
+    Load the stratified index of an array of labels (memory-mapped), built again when it is older than the labels
+    :param l_path: paths of the files of the rows of label 0 and of label 1
+    :param labels: array of labels, only read if the stratified index has to be built
+    :param l_path_reference: paths of the files from which the labels are read
+    :return: list of the arrays of the rows of label 0 and of label 1
+    """
+    if not all(isfile(path) for path in l_path) or \
+            min(getmtime(path) for path in l_path) < max(getmtime(path) for path in l_path_reference):
+        build_strata(l_path, labels)
+    return [load(path, mmap_mode='r') for path in l_path]
+
+
+def sample_feature_store(nb, randomness, pos_equal_neg, generator=None, positive_ratio=None, hashes=None):
+    """
+    Draw characteristic vectors and their labels from the binary feature store. The balanced (or any ratio) samples
+    are drawn directly from the rows of each label (stratified index of the store).
+    :param nb: number of vector to collect
+    :param randomness: if the collection should be randomised among all the vectors of the store, otherwise the first
+    vectors are used
+    :param pos_equal_neg: if we want the same amount of positive and negative vectors (nb // 2 of each)
+    :param generator:
+        (optional) numpy random Generator (see Data.sampling.get_generator), seeded for reproducible samples
+        (default) a new random generator
+    :param positive_ratio: (optional) share of positive vectors in the collection, when pos_equal_neg is False
+    :param hashes: (optional) content hashes of the current resources, to check the shards (see load_feature_store)
+    :return: tuple of array containing the features vectors (int16) and labels vectors (float) corresponding
+    """
+    features, labels = load_feature_store(hashes)
+    if generator is None:
+        generator = get_generator()
+    sizes = strata_sizes(nb, pos_equal_neg, positive_ratio)
+    if sizes is not None:
+        strata = load_strata([get_path_resource(STRATA_STORE.format(label)) for label in [0, 1]], labels,
+                             [get_path_resource(MANIFEST_STORE)])
+        indexes = sample_strata(strata, sizes, randomness, generator)
+    elif randomness:
+        indexes = sample_indexes(len(labels), nb, generator)
+    else:
+        indexes = first_elements(len(labels), nb)
+
+    # the vectors are read in the order of the file and put back in the order of the draw
+    order = argsort(indexes)
+    m_features, m_labels = empty((len(indexes), features.shape[1]), dtype=int16), empty(len(indexes))
+    m_features[order], m_labels[order] = features[indexes[order]], labels[indexes[order]]
+    return m_features, m_labels
+
+
+def shuffled_feature_store_batches(batch_size=1000, generator=None, hashes=None):
+    """
+    Read all the vectors of the binary feature store by mini batches, in a new random order at each call (one epoch
+    of a stochastic trainer). Only one batch is kept in memory at a time.
+    :param batch_size: number of vectors per batch, the last batch can be smaller
+    :param generator:
+        (optional) numpy random Generator (see Data.sampling.get_generator), seeded for a reproducible order
+        (default) a new random generator
+    :param hashes: (optional) content hashes of the current resources, to check the shards (see load_feature_store)
+    :return: generator of tuples of array containing the features vectors (int16) and labels vectors (float)
+    """
+    features, labels = load_feature_store(hashes)
+    if generator is None:
+        generator = get_generator()
+    order = generator.permutation(len(labels))
+    for start in range(0, len(order), batch_size):
+        # the rows of a batch are read in the order of the file
+        indexes = sort(order[start:start + batch_size])
+        yield features[indexes].astype(int16), labels[indexes].astype(float)
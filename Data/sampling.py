@@ -0,0 +1,123 @@
+# https://dl.acm.org/doi/10.1145/198429.198435 : Reservoir-sampling algorithms of time complexity O(n(1 + log(N/n)))
+
+from itertools import islice
+from math import exp, floor, log
+
+from numpy import arange, concatenate, sort
+from numpy.random import default_rng
+
+# marks the end of the iterable in reservoir_sample
+_END = object()
+
+
+def get_generator(seed=None):
+    """
+    Random generator used by all the samplers
+    :param seed:
+        (optional) integer (or Generator) to draw the same samples again, for reproducible profiles
+        (default) samples different at each call
+    :return: numpy random Generator
+    """
+    return default_rng(seed)
+
+
+def sample_indexes(nb_elements, nb, generator):
+    """
+    Draw distinct indexes uniformly, in a random order, in O(nb) time when nb is small compared to nb_elements
+    :param nb_elements: number of elements to draw from
+    :param nb: number of indexes to draw, up to nb_elements
+    :param generator: numpy random Generator (see get_generator)
+    :return: array of nb distinct indexes among range(nb_elements)
+    """
+    nb = min(nb, nb_elements)
+    if nb == nb_elements:
+        return generator.permutation(nb_elements)
+    return generator.choice(nb_elements, nb, replace=False)
+
+
+def sample_elements(elements, nb, generator):
+    """
+    Draw distinct elements of an array uniformly, in a random order
+    :param elements: array of elements (for example indexes of lines) to draw from
+    :param nb: number of elements to draw, up to len(elements)
+    :param generator: numpy random Generator (see get_generator)
+    :return: array of nb elements
+    """
+    return elements[sample_indexes(len(elements), nb, generator)]
+
+
+def first_elements(nb_elements, nb, reverse=False):
+    """
+    Indexes of the first (or last) elements, for the non randomised samples
+    :param nb_elements: number of elements
+    :param nb: number of indexes, up to nb_elements
+    :param reverse: take the last elements, from the end
+    :return: array of nb indexes
+    """
+    nb = min(nb, nb_elements)
+    if reverse:
+        return arange(nb_elements - 1, nb_elements - 1 - nb, -1)
+    return arange(nb)
+
+
+def strata_sizes(nb, pos_equal_neg=False, positive_ratio=None):
+    """
+    Number of negative and positive elements of a sample stratified by label
+    :param nb: number of elements of the sample
+    :param pos_equal_neg: if we want the same amount of positive and negative elements (nb // 2 of each)
+    :param positive_ratio: (optional) share of positive elements in the sample, between 0 and 1
+    :return: list [number of negative elements, number of positive elements], None when the sample is not stratified
+    """
+    if pos_equal_neg:
+        return [nb // 2, nb // 2]
+    if positive_ratio is not None:
+        nb_positive = int(round(nb * positive_ratio))
+        return [nb - nb_positive, nb_positive]
+    return None
+
+
+def sample_strata(strata, sizes, randomness, generator, reverse=False):
+    """
+    Draw a stratified sample : the desired number of elements is drawn directly from each stratum, no draw is rejected
+    :param strata: list of arrays of elements, one per stratum (for example the rows of label 0 and of label 1)
+    :param sizes: number of elements to draw from each stratum, up to the size of the stratum
+    :param randomness: if the elements are drawn randomly (in a random order), otherwise the first elements of each
+    stratum are taken, in increasing order
+    :param generator: numpy random Generator (see get_generator)
+    :param reverse: if the elements not drawn randomly are taken from the end of the strata, in decreasing order
+    :return: array of the elements drawn
+    """
+    if randomness:
+        elements = concatenate([sample_elements(stratum, size, generator) for stratum, size in zip(strata, sizes)])
+        return elements[sample_indexes(len(elements), len(elements), generator)]
+    elements = sort(concatenate([stratum[first_elements(len(stratum), size, reverse)]
+                                 for stratum, size in zip(strata, sizes)]))
+    return elements[::-1] if reverse else elements
+
+
+def reservoir_sample(iterable, nb, generator):
+    """
+    Draw nb elements uniformly from an iterable whose length is unknown, in a single pass and keeping only nb elements
+    in memory. Whole runs of elements are skipped without drawing a random number for each one (algorithm L).
+    :param iterable: iterable of elements (for example the lines of a file)
+    :param nb: number of elements to draw
+    :param generator: numpy random Generator (see get_generator)
+    :return: list of at most nb elements, in a random order
+    """
+    iterator = iter(iterable)
+    reservoir = list(islice(iterator, nb))
+    if len(reservoir) < nb or not nb:
+        generator.shuffle(reservoir)
+        return reservoir
+
+    # 1 - random() is in ]0, 1], its logarithm is always defined
+    weight = exp(log(1 - generator.random()) / nb)
+    while True:
+        skip = floor(log(1 - generator.random()) / log(1 - weight))
+        element = next(islice(iterator, skip, None), _END)
+        if element is _END:
+            break
+        reservoir[generator.integers(nb)] = element
+        weight *= exp(log(1 - generator.random()) / nb)
+    generator.shuffle(reservoir)
+    return reservoir
@@ -1,31 +1,114 @@
-from numpy import array
+from copy import copy
+from os.path import isfile
 
 from Classifier.Kernel import Kernel
+from Classifier.Profile.profile_file import binary_name_file, get_path_profile
 from Classifier.SVM import SVM, get_from_file
-from Classifier.features import characteristic_vector
-from Classifier.profile import construct_name_file
-from Data.clean_data import clean_text
+from Classifier.evaluation import evaluate_profiles, score_classifier
+from Classifier.features import characteristic_matrix
+from Classifier.profile import construct_name_file, create_random_fourier_profile, fourier_name_file
 from Data.dataset import get_characteristic_label_vectors
 from Data.twitter_collect import collect_tweet, search_sample
-from Ressources.resource import get_correct_stop_word
 
 
-def load_classifier(size_sample, randomness, pos_eq_neg, kernel):
+def _default_profiles():
+    """
+    Parameters of all the default profiles
+    :return: list of tuples (size of the sample, randomised, equal positive negative, name of the kernel)
+    """
+    return [(size_sample, randomised, equal_pos_neg, name_kernel)
+            for name_kernel in ["linear", "poly_kernel", "gaussian", "radial_basis"]
+            for size_sample in [1000, 10000]
+            for randomised in [True, False]
+            for equal_pos_neg in [True, False]]
+
+
+def _name_file_classifier(size_sample, randomness, pos_eq_neg, kernel, dimension=None):
+    """
+    Name of the file of the desired SVM classifier, the binary version of the profile is preferred when it exists
+    :param size_sample: size of the sample used
+    :param randomness: boolean indicating the randomness of the sample
+    :param pos_eq_neg: boolean indicating if the number of positive and negative features vectors is equal
+    :param kernel: name of the kernel used
+    :param dimension: (optional) number of random features of the random Fourier features version of the profile
+    :return: string name of the file
+    """
+    name_file = construct_name_file(size_sample, randomness, pos_eq_neg, kernel)
+    if dimension is not None:
+        name_file = fourier_name_file(name_file, dimension)
+    if isfile(get_path_profile(binary_name_file(name_file))):
+        # the binary version of the profile is memory-mapped instead of parsed
+        name_file = binary_name_file(name_file)
+    return name_file
+
+
+def _fourier_dimension(kernel, dimension):
+    """
+    Number of random features actually used for a kernel, only the gaussian and radial_basis profiles are approximated
+    :param kernel: name of the kernel used
+    :param dimension: (optional) number of random features asked
+    :return: the number of random features or None for the exact profile
+    """
+    if kernel not in ["gaussian", "radial_basis"]:
+        return None
+    return dimension
+
+
+def _profile_file(size_sample, randomness, pos_eq_neg, kernel, dimension=None):
+    """
+    Name of the file of the desired SVM classifier, the random Fourier features version of the profile is created the
+    first time it is asked
+    :param size_sample: size of the sample used
+    :param randomness: boolean indicating the randomness of the sample
+    :param pos_eq_neg: boolean indicating if the number of positive and negative features vectors is equal
+    :param kernel: name of the kernel used
+    :param dimension: (optional) number of random features (gaussian and radial_basis profiles only)
+    :return: string name of the file
+    """
+    dimension = _fourier_dimension(kernel, dimension)
+    name_file = _name_file_classifier(size_sample, randomness, pos_eq_neg, kernel, dimension)
+    if dimension is not None and not isfile(get_path_profile(name_file)):
+        name_file = create_random_fourier_profile(_name_file_classifier(size_sample, randomness, pos_eq_neg, kernel),
+                                                  dimension)
+    return name_file
+
+
+def load_classifier(size_sample, randomness, pos_eq_neg, kernel, registry=None, dimension=None):
     """
     Load the desired SVM classifier saved in a file
     :param size_sample: size of the sample used
     :param randomness: boolean indicating the randomness of the sample
     :param pos_eq_neg: boolean indicating if the number of positive and negative features vectors is equal
     :param kernel: name of the kernel used
+    :param registry:
+        (optional) ProfileRegistry keeping the profiles already loaded
+        (default) the profile is read from its file
+    :param dimension:
+        (optional) number of random features : a gaussian or radial_basis profile is approximated with random Fourier
+        features (created from the profile the first time), the smaller the faster and the less accurate
+        (default) the support vectors of the profile are used
     :return: SVM Predictor (SVM classifier ready to predict)
     """
     if type(size_sample) is str:
         size_sample = int("".join(size_sample.split(" tweets")[0].split()))
 
-    return get_from_file(construct_name_file(size_sample, randomness, pos_eq_neg, kernel))
+    name_file = _profile_file(size_sample, randomness, pos_eq_neg, kernel, dimension)
+    if registry is None:
+        return get_from_file(name_file)
+    # shallow copy : the arrays are shared but the performance measured by the caller stays its own
+    return copy(registry.get(name_file))
 
 
-def _minimal_analysis(text, classifier, Resource, threshold, language='en'):
+def warm_default_classifiers(registry):
+    """
+    Load all the default profiles in the registry, in a background thread
+    :param registry: ProfileRegistry in which to load the profiles
+    :return: the thread loading the profiles (already started)
+    """
+    return registry.preload([_name_file_classifier(*parameters) for parameters in _default_profiles()])
+
+
+def _minimal_analysis(text, classifier, Resource, threshold, language='en', cache=None):
     """
     Analyse a simple text / tweet with the classifier and the resources provided
     :param text: string containing the text to predict the sentiment of
@@ -36,16 +119,63 @@ def _minimal_analysis(text, classifier, Resource, threshold, language='en'):
     performance score, 'Neutral' is both considered 'Positive' and 'Negative'
     :param language: not used, choose between french and english
         'fr' | 'en'
+    :param cache:
+        (optional) PredictionCache to reuse the prediction if the text was already analysed
+        (default) the text is analysed
     :return: Tuples containing the sentiment of the text and its characteristic vector. The sentiment could be :
         'Negative' | 'Neutral' | 'Positive'
     """
-    list_text = clean_text(text, get_correct_stop_word(Resource, language))
-    m_features = list()
-    m_features.append(characteristic_vector(list_text, Resource))
-    return classifier.predict(array(m_features), threshold), m_features
+    return _batch_analysis([text], classifier, Resource, threshold, language, cache)[0]
 
 
-def analyse_text(custom_text, classifier, Resource, threshold, language='en'):
+def _batch_analysis(l_text, classifier, Resource, threshold, language='en', cache=None):
+    """
+    Analyse multiple texts / tweets with the classifier and the resources provided, with a single prediction call
+    :param l_text: list of strings containing the texts to predict the sentiment of
+    :param classifier: SVM classifier to use to predict the sentiment
+    :param Resource: class object containing all the resources (positive words, negative words, positive emoticons,
+    negative emoticons, stop words)
+    :param threshold: From -'threshold' to +'threshold' the class label will be 'Neutral'. In the computation of the
+    performance score, 'Neutral' is both considered 'Positive' and 'Negative'
+    :param language: not used, choose between french and english
+        'fr' | 'en'
+    :param cache:
+        (optional) PredictionCache to reuse the predictions of the texts already analysed (the repeated texts of the
+        batch count as hits)
+        (default) every text is analysed
+    :return: list of tuples containing the sentiment of each text and its characteristic vector. The sentiment could
+    be :
+        'Negative' | 'Neutral' | 'Positive'
+    """
+    result = [None] * len(l_text)
+    missing = dict()
+    for index, text in enumerate(l_text):
+        if cache is None:
+            missing.setdefault(index, list()).append(index)
+            continue
+        key = cache.key(text, classifier, threshold, language)
+        if key in missing:
+            # same text earlier in this batch : predicted only once, a hit like a text already in the cache
+            missing[key].append(index)
+            cache.record_hit()
+            continue
+        result[index] = cache.get(key, classifier)
+        if result[index] is None:
+            missing[key] = [index]
+
+    if missing:
+        m_features = characteristic_matrix([l_text[indexes[0]] for indexes in missing.values()], Resource, language)
+        labels = classifier.predict_batch(m_features, threshold)
+        for (key, indexes), label, feature_vector in zip(missing.items(), labels, m_features):
+            prediction = (str(label), [feature_vector.tolist()])
+            if cache is not None:
+                cache.put(key, classifier, prediction)
+            for index in indexes:
+                result[index] = prediction
+    return result
+
+
+def analyse_text(custom_text, classifier, Resource, threshold, language='en', cache=None):
     """
     Predict the sentiment of the text
     :param custom_text: string containing the text to analyse
@@ -56,15 +186,18 @@ def analyse_text(custom_text, classifier, Resource, threshold, language='en'):
     performance score, 'Neutral' is both considered 'Positive' and 'Negative'
     :param language: not used, choose between french and english
         'fr' | 'en'
+    :param cache:
+        (optional) PredictionCache to reuse the predictions of the texts already analysed
+        (default) every text is analysed
     :return: list of tuples containing the text and a tuple containing the sentiment of the text and its
     characteristic vector. The sentiment could be :
         'Negative' | 'Neutral' | 'Positive'
     """
     return [(bytes(custom_text, 'utf-8'),
-             _minimal_analysis(bytes(custom_text, 'utf-8'), classifier, Resource, threshold, language))]
+             _minimal_analysis(bytes(custom_text, 'utf-8'), classifier, Resource, threshold, language, cache))]
 
 
-def analyse_file(file_content, classifier, Resource, threshold, language='en'):
+def analyse_file(file_content, classifier, Resource, threshold, language='en', cache=None):
     """
     Predict the sentiment for every line, representing a text / tweet, in the file
     :param file_content: list of text / tweet described by one line in the file
@@ -75,14 +208,17 @@ def analyse_file(file_content, classifier, Resource, threshold, language='en'):
     performance score, 'Neutral' is both considered 'Positive' and 'Negative'
     :param language: not used, choose between french and english
         'fr' | 'en'
+    :param cache:
+        (optional) PredictionCache to reuse the predictions of the texts already analysed
+        (default) every text is analysed
     :return: list of tuples containing the text and a tuple containing the sentiment of the text and its
     characteristic vector. The sentiment could be :
         'Negative' | 'Neutral' | 'Positive'
     """
-    return [(line, _minimal_analysis(line, classifier, Resource, threshold, language)) for line in file_content]
+    return list(zip(file_content, _batch_analysis(file_content, classifier, Resource, threshold, language, cache)))
 
 
-def analyse_query(query, classifier, Resource, threshold, language='en'):
+def analyse_query(query, classifier, Resource, threshold, language='en', cache=None):
     """
     Predict the sentiment of some trending tweets around the query
     :param query: '#...' to look for
@@ -93,15 +229,18 @@ def analyse_query(query, classifier, Resource, threshold, language='en'):
     performance score, 'Neutral' is both considered 'Positive' and 'Negative'
     :param language: not used, choose between french and english
         'fr' | 'en'
+    :param cache:
+        (optional) PredictionCache to reuse the predictions of the texts already analysed
+        (default) every text is analysed
     :return: list of tuples containing the text and a tuple containing the sentiment of the text and its
     characteristic vector. The sentiment could be :
         'Negative' | 'Neutral' | 'Positive'
     """
-    return [(bytes(line, 'utf-8'), _minimal_analysis(bytes(line, 'utf-8'), classifier, Resource, threshold, language))
-            for line in search_sample(query)]
+    l_text = [bytes(line, 'utf-8') for line in search_sample(query)]
+    return list(zip(l_text, _batch_analysis(l_text, classifier, Resource, threshold, language, cache)))
 
 
-def analyse_tweets(nb_tweets, classifier, Resource, threshold, language='en'):
+def analyse_tweets(nb_tweets, classifier, Resource, threshold, language='en', cache=None):
     """
     Predict the sentiment of the desired number of tweets from the Twitter stream
     :param nb_tweets: number of tweets to collect from the Twitter stream
@@ -112,25 +251,15 @@ def analyse_tweets(nb_tweets, classifier, Resource, threshold, language='en'):
     performance score, 'Neutral' is both considered 'Positive' and 'Negative'
     :param language: not used, choose between french and english
         'fr' | 'en'
+    :param cache:
+        (optional) PredictionCache to reuse the predictions of the texts already analysed
+        (default) every text is analysed
     :return: list of tuples containing the text and a tuple containing the sentiment of the text and its
     characteristic vector. The sentiment could be :
         'Negative' | 'Neutral' | 'Positive'
     """
-    return [(bytes(line, 'utf-8'), _minimal_analysis(bytes(line, 'utf-8'), classifier, Resource, threshold, language))
-            for line in
-            collect_tweet(nb_tweets)]
-
-
-def _minimal_predict(Classifier, vector, threshold):
-    """
-    Analyse one feature vector and predict the sentiment of this vector
-    :param Classifier: SVM classifier to use to predict the sentiment
-    :param vector: array containing the features (in a vector) of a corresponding tweet / text
-    :param threshold: From -'threshold' to +'threshold' the class label will be 'Neutral'. In the computation of the
-    performance score, 'Neutral' is both considered 'Positive' and 'Negative'
-    :return: string containing the label of the features vector
-    """
-    return Classifier.predict(array([vector.tolist()]), threshold)
+    l_text = [bytes(line, 'utf-8') for line in collect_tweet(nb_tweets)]
+    return list(zip(l_text, _batch_analysis(l_text, classifier, Resource, threshold, language, cache)))
 
 
 def _performance(Classifier, features, labels, threshold):
@@ -144,17 +273,24 @@ def _performance(Classifier, features, labels, threshold):
     performance score, 'Neutral' is both considered 'Positive' and 'Negative'
     :return: float containing the score of the classifier
     """
-    correct = 0
-    for index, vector in enumerate(features):
-        result = _minimal_predict(Classifier, vector, threshold)
-        if result == "Positive" and labels[index] == 1.0 or result == "Negative" and \
-                labels[index] == 0.0 or result == "Neutral":
-            correct += 1
-    Classifier.performance = correct / len(labels) * 100
+    Classifier.performance = score_classifier(Classifier, features, labels, threshold)
     return Classifier.performance
 
 
-def _prediction(features, labels, threshold, size_sample, randomised, equal_pos_neg, name_kernel, custom_SVM=None):
+def _result_name(size_sample, randomised, equal_pos_neg, name_kernel, dimension=None):
+    """
+    Name of a classifier in the results of predict_test
+    :return: name of the file of the profile, without extension
+    """
+    name_file = construct_name_file(size_sample, randomised, equal_pos_neg, name_kernel)
+    dimension = _fourier_dimension(name_kernel, dimension)
+    if dimension is not None:
+        name_file = fourier_name_file(name_file, dimension)
+    return str(name_file.split(".json")[0])
+
+
+def _prediction(features, labels, threshold, size_sample, randomised, equal_pos_neg, name_kernel, custom_SVM=None,
+                registry=None, dimension=None):
     """
     Generic method to compute the performance score of a designated classifier
     :param features: array containing multiple features vectors
@@ -166,18 +302,23 @@ def _prediction(features, labels, threshold, size_sample, randomised, equal_pos_
     :param equal_pos_neg: boolean to indicate if the number of positive and negative tweets of the sample use to
     build and save the SVM classifier
     :param name_kernel: name of the kernel use to build and save the SVM classifier
+    :param custom_SVM: custom SVM to test
+    :param registry: (optional) ProfileRegistry keeping the profiles already loaded
+    :param dimension: (optional) number of random features approximating a gaussian or radial_basis profile
     :return: tuple containing the general name of the classifier and the performance score of this classifier
     """
     if custom_SVM:
         Classifier = custom_SVM
+        dimension = None
     else:
-        Classifier = load_classifier(size_sample, randomised, equal_pos_neg, name_kernel)
-    name_file = str(construct_name_file(size_sample, randomised, equal_pos_neg, name_kernel).split(".json")[0])
-    return name_file, _performance(Classifier, features, labels, threshold)
+        Classifier = load_classifier(size_sample, randomised, equal_pos_neg, name_kernel, registry, dimension)
+    return _result_name(size_sample, randomised, equal_pos_neg, name_kernel, dimension), _performance(
+        Classifier, features, labels, threshold)
 
 
 def predict_test(nb_tweet_sample, Resource, threshold, keep_null_vector, size_sample=None, randomised=None,
-                 equal_pos_neg=None, name_kernel=None, custom_SVM=None, language='en'):
+                 equal_pos_neg=None, name_kernel=None, custom_SVM=None, language='en', registry=None, processes=None,
+                 dimension=None):
     """
     Measure the performance score for one specific classifier or all the default profiles
     :param nb_tweet_sample: size of the sample to test against the classifier
@@ -194,6 +335,17 @@ def predict_test(nb_tweet_sample, Resource, threshold, keep_null_vector, size_sa
     :param custom_SVM: custom SVM to test
     :param language: not used, choose between english and french
         'en' | 'fr'
+    :param registry:
+        (optional) ProfileRegistry keeping the profiles already loaded
+        (default) the profiles are read from their files
+    :param processes: number of processes used to evaluate all the default profiles in parallel. The profiles kept
+    by the registry are sent to the workers, without a registry each worker reads the profiles from their files. With 1
+    process the profiles are evaluated one after the other (through the registry if there is one)
+        (default) number of cores
+    :param dimension:
+        (optional) number of random features : the gaussian and radial_basis profiles are approximated with random
+        Fourier features (see load_classifier)
+        (default) the exact profiles are used
     :return: list containing tuples of the name of the classifier and its performance score
     """
     m_features, m_labels = get_characteristic_label_vectors(nb_tweet_sample, randomised, equal_pos_neg, Resource,
@@ -201,18 +353,22 @@ def predict_test(nb_tweet_sample, Resource, threshold, keep_null_vector, size_sa
 
     result = list()
     if name_kernel is not None and custom_SVM is None:
-        result.append(_prediction(m_features, m_labels, threshold, size_sample, randomised, equal_pos_neg, name_kernel))
+        result.append(_prediction(m_features, m_labels, threshold, size_sample, randomised, equal_pos_neg, name_kernel,
+                                  registry=registry, dimension=dimension))
     elif custom_SVM:
         result.append(_prediction(m_features, m_labels, threshold, size_sample, randomised, equal_pos_neg, name_kernel,
                                   custom_SVM))
+    elif processes == 1:
+        for size_sample, randomised, equal_pos_neg, name_kernel in _default_profiles():
+            result.append(_prediction(m_features, m_labels, threshold, size_sample, randomised, equal_pos_neg,
+                                      name_kernel, registry=registry, dimension=dimension))
     else:
-        for name_kernel in ["linear", "poly_kernel", "gaussian", "radial_basis"]:
-            for size_sample in [1000, 10000]:
-                for randomised in [True, False]:
-                    for equal_pos_neg in [True, False]:
-                        result.append(
-                                _prediction(m_features, m_labels, threshold, size_sample, randomised, equal_pos_neg,
-                                            name_kernel))
+        l_profile = [_profile_file(*parameters, dimension) for parameters in _default_profiles()]
+        if registry is not None:
+            l_profile = [registry.get(name_file) for name_file in l_profile]
+        l_performance = evaluate_profiles(m_features, m_labels, threshold, l_profile, processes)
+        for parameters, performance in zip(_default_profiles(), l_performance):
+            result.append((_result_name(*parameters, dimension), performance))
     return result
 
 
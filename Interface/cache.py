@@ -0,0 +1,99 @@
+from collections import OrderedDict
+from time import monotonic
+
+
+def normalize_text(text):
+    """
+    Normalize a text so that texts giving the same cleaned elements share the same key (the cleaning is case
+    insensitive and ignores repeated whitespaces)
+    :param text: bytes containing the text / tweet
+    :return: bytes normalized
+    """
+    return b" ".join(element for element in text.lower().split(b" ") if element)
+
+
+class PredictionCache(object):
+
+    def __init__(self, max_size=100000, ttl=None):
+        """
+        Bounded cache of the predictions already made, evicted in least recently used order
+        :param max_size: maximal number of predictions kept
+        :param ttl:
+            (optional) number of seconds after which a prediction is no longer used
+            (default) the predictions never expire
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(text, classifier, threshold, language='en'):
+        """
+        Build the key of a prediction
+        :param text: bytes containing the text / tweet
+        :param classifier: SVM classifier used to predict the sentiment
+        :param threshold: threshold used to predict the sentiment
+        :param language: language used to clean the text
+        :return: tuple usable as a key of the cache
+        """
+        return normalize_text(text), id(classifier), threshold, language
+
+    def get(self, key, classifier):
+        """
+        Look for a prediction in the cache
+        :param key: key built with PredictionCache.key
+        :param classifier: SVM classifier used to predict the sentiment (to make sure it is the very same object)
+        :return: the prediction (sentiment, characteristic vector) or None if it is not in the cache
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            time_stored, classifier_stored, prediction = entry
+            if classifier_stored is classifier and (self.ttl is None or monotonic() - time_stored <= self.ttl):
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return prediction
+            del self.entries[key]
+        self.misses += 1
+        return None
+
+    def record_hit(self):
+        """
+        Count a prediction reused without being looked up in the cache : the same text earlier in the batch being
+        analysed, predicted only once
+        :return:
+        """
+        self.hits += 1
+
+    def put(self, key, classifier, prediction):
+        """
+        Store a prediction in the cache, evicting the least recently used one if the cache is full
+        :param key: key built with PredictionCache.key
+        :param classifier: SVM classifier used to predict the sentiment
+        :param prediction: tuple containing the sentiment and the characteristic vector of the text
+        :return:
+        """
+        self.entries[key] = (monotonic(), classifier, prediction)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Empty the cache and reset the counters
+        :return:
+        """
+        self.entries.clear()
+        self.hits, self.misses, self.evictions = 0, 0, 0
+
+    def statistics(self):
+        """
+        Counters of the use of the cache
+        :return: dictionary containing the hits, misses, evictions, hit rate and the number of predictions cached
+        """
+        requests = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / requests if requests else 0.0, "size": len(self.entries)}
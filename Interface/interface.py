@@ -11,12 +11,17 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 from mpl_toolkits.mplot3d import Axes3D
 
+from Classifier.ProfileRegistry import ProfileRegistry
 from Classifier.SVM import get_from_file
 from Classifier.profile import construct_name_file, readable_name_classifier
 from Interface.actions import (analyse_file, analyse_query, analyse_text, analyse_tweets, custom_training,
-                               load_classifier, predict_test)
+                               load_classifier, predict_test, warm_default_classifiers)
+from Interface.cache import PredictionCache
 from Ressources.resource import Resource
 
+# number of random features proposed to approximate the gaussian and radial basis profiles
+RFF_DIMENSIONS = ("Exact", "100", "500", "2000")
+
 
 class ToolTip(object):
 
@@ -67,11 +72,16 @@ class Application(Frame):
         self.toggle_nb_pos_neg_p = StringVar()
         self.train_kernel = StringVar()
         self.predict_kernel = StringVar()
+        self.rff_dimension = StringVar()
+        self.rff_dimension_p = StringVar()
         self.keep_null_vector_t = StringVar()
         self.keep_null_vector_p = StringVar()
         self.SVMClassifier = None
         self.custom_SVMClassifier = None
         self.Resource = Resource()
+        self.prediction_cache = PredictionCache()
+        self.registry = ProfileRegistry()
+        warm_default_classifiers(self.registry)
         self.count_visualiser = 0
         self.active_view = StringVar()
         self.canvas = list()
@@ -91,11 +101,23 @@ class Application(Frame):
             self.SVMClassifier = self._load_default_classifier()
             return self.SVMClassifier
 
+    @staticmethod
+    def _get_dimension(variable):
+        """
+        Number of random features chosen in a 'Random Fourier features' spinbox
+        :param variable: StringVar of the spinbox
+        :return: the number of random features or None for the exact profile
+        """
+        if variable.get().isdigit():
+            return int(variable.get())
+        return None
+
     def _load_default_classifier(self):
         self.SVMClassifier = load_classifier(self.size_sample.get(),
                                              self.toggle_randomness.get() == "Randomised",
                                              self.toggle_nb_pos_neg.get() == "Equal",
-                                             self.analyse_kernel.get())
+                                             self.analyse_kernel.get(), self.registry,
+                                             self._get_dimension(self.rff_dimension))
         if self.SVMClassifier.performance <= 50:
             color = "red"
         elif self.SVMClassifier.performance < 75:
@@ -195,6 +217,19 @@ class Application(Frame):
 
         kernel_frame.grid(column=4, row=0, padx=10, pady=10)
 
+        # ---------- Approximate the classifier with random Fourier features -------------
+        dimension_frame = LabelFrame(default_classifier, text="Random Fourier features")
+
+        self.rff_dimension.set("Exact")
+        Spinbox(dimension_frame, values=RFF_DIMENSIONS, textvariable=self.rff_dimension, state="readonly",
+                justify='center', command=self._load_default_classifier).grid(padx=5, pady=5)
+        ToolTip(dimension_frame,
+                text="Only for the gaussian and radial basis kernels : the profile is approximated with this number "
+                     "of random features.\nThe smaller the faster and the less accurate, 'Exact' uses the support "
+                     "vectors")
+
+        dimension_frame.grid(column=5, row=0, padx=10, pady=10)
+
         # ---------- Performance of the classifier choose -------------
 
         performance_frame = Frame(default_classifier)
@@ -366,6 +401,19 @@ class Application(Frame):
 
         null_vector_frame.grid(column=2, row=0, padx=10, pady=10)
 
+        # ---------- Approximate the classifiers with random Fourier features -------------
+        dimension_frame = LabelFrame(for_all_frame, text="Random Fourier features")
+
+        self.rff_dimension_p.set("Exact")
+        Spinbox(dimension_frame, values=RFF_DIMENSIONS, textvariable=self.rff_dimension_p, state="readonly",
+                justify='center').grid(column=0, row=0, padx=5, pady=5)
+        ToolTip(dimension_frame,
+                text="Only for the gaussian and radial basis kernels : the profiles are approximated with this "
+                     "number of random features.\nThe smaller the faster and the less accurate, 'Exact' uses the "
+                     "support vectors")
+
+        dimension_frame.grid(column=3, row=0, padx=10, pady=10)
+
         for_all_frame.grid(padx=10, pady=10)
 
         # Test a specific SVM classifier
@@ -426,7 +474,8 @@ class Application(Frame):
             result = predict_test(self.nb_tweet_predict.get(), self.Resource, float(threshold_spinbox.get()),
                                   self.keep_null_vector_p.get() == "Keep null vector",
                                   self.size_sample_p.get(), self.toggle_randomness_p.get() == "Randomised",
-                                  self.toggle_nb_pos_neg_p.get() == "Equal", self.predict_kernel.get())
+                                  self.toggle_nb_pos_neg_p.get() == "Equal", self.predict_kernel.get(),
+                                  registry=self.registry, dimension=self._get_dimension(self.rff_dimension_p))
             self._create_viewer_panel(self.display, result)
 
         b_frame_2 = Frame(test_frame)
@@ -441,7 +490,7 @@ class Application(Frame):
                                       self.keep_null_vector_p.get() == "Keep null vector",
                                       self.size_sample_p.get(), self.toggle_randomness_p.get() == "Randomised",
                                       self.toggle_nb_pos_neg_p.get() == "Equal",
-                                      str(self.custom_SVMClassifier.kernel).split('.')[1], self.custom_SVMClassifier)
+                                      self.custom_SVMClassifier.kernel.name, self.custom_SVMClassifier)
                 self._create_viewer_panel(self.display, result)
 
         b_frame_3 = Frame(test_frame)
@@ -454,7 +503,8 @@ class Application(Frame):
         # Test all SVM default profiles
         def test_all():
             result = predict_test(self.nb_tweet_predict.get(), self.Resource, float(threshold_spinbox.get()),
-                                  self.keep_null_vector_p.get() == "Keep null vector")
+                                  self.keep_null_vector_p.get() == "Keep null vector", registry=self.registry,
+                                  dimension=self._get_dimension(self.rff_dimension_p))
             self._create_viewer_panel(self.display, result)
 
         b_frame_1 = Frame(test_frame)
@@ -522,7 +572,8 @@ class Application(Frame):
         def text_analysis():
             if self.value_submit.get() != "Text to analyse":
                 result = analyse_text(self.value_submit.get(), self._get_classifier(), self.Resource,
-                                      float(threshold_spinbox.get()), self.toggle_language.get())
+                                      float(threshold_spinbox.get()), self.toggle_language.get(),
+                                      self.prediction_cache)
                 self._create_viewer_panel(self.display, result)
 
         b_frame_1 = Frame(custom_text_frame)
@@ -542,7 +593,8 @@ class Application(Frame):
             file_name = askopenfile(title="Open file of tweets",
                                     filetypes=[('txt files', '.txt'), ('csv files', '.csv')])
             result = analyse_file(open(file_name.name, "rb").readlines()[:500], self._get_classifier(), self.Resource,
-                                  float(threshold_spinbox.get()), self.toggle_language.get())
+                                  float(threshold_spinbox.get()), self.toggle_language.get(),
+                                  self.prediction_cache)
             self._create_viewer_panel(self.display, result)
 
         Label(custom_file_frame).grid(row=0, padx=5, pady=5)
@@ -579,11 +631,13 @@ class Application(Frame):
         def query_analysis():
             if self.user_query.get() != "'#ITAR'" and '#' in self.user_query.get():
                 result = analyse_query(self.user_query.get(), self._get_classifier(), self.Resource,
-                                       float(threshold_spinbox.get()), self.toggle_language.get())
+                                       float(threshold_spinbox.get()), self.toggle_language.get(),
+                                       self.prediction_cache)
                 self._create_viewer_panel(self.display, result)
             elif self.user_query.get() != "'#ITAR'":
                 result = analyse_query('#' + self.user_query.get(), self._get_classifier(), self.Resource,
-                                       float(threshold_spinbox.get()), self.toggle_language.get())
+                                       float(threshold_spinbox.get()), self.toggle_language.get(),
+                                       self.prediction_cache)
                 self._create_viewer_panel(self.display, result)
 
         b_frame_3 = Frame(query_frame)
@@ -605,7 +659,8 @@ class Application(Frame):
 
         def analyse_stream_tweet():
             result = analyse_tweets(self.nb_tweet_collect.get(), self._get_classifier(), self.Resource,
-                                    float(threshold_spinbox.get()), self.toggle_language.get())
+                                    float(threshold_spinbox.get()), self.toggle_language.get(),
+                                    self.prediction_cache)
             self._create_viewer_panel(self.display, result)
 
         b_frame_4 = Frame(number_frame)
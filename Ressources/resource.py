@@ -51,7 +51,7 @@ def _load_stop_word(language='en'):
     Load all the stop words for the corresponding language
     :param language: Choose the language from french to english
         'fr' | 'en'
-    :return: list of stop words in the desired language
+    :return: set of stop words in the desired language
     """
     if language == 'fr':
         path = get_path_resource('stop_word_fr.txt')
@@ -59,7 +59,7 @@ def _load_stop_word(language='en'):
         path = get_path_resource('stop_word_en.txt')
 
     with open(path, 'rb') as file_stop_word:
-        stop_word = [clean_end_line(x) for x in file_stop_word.readlines()]
+        stop_word = frozenset(clean_end_line(x) for x in file_stop_word.readlines())
     return stop_word
 
 
@@ -0,0 +1,62 @@
+from re import escape, match, sub
+
+from numpy.random import default_rng
+
+from Data.clean_data import clean_text, clean_texts
+
+STOP_WORDS = {b"the", b"a", b"is", b"ne", b"le"}
+# words, mentions, urls, hashtags, punctuations, repetitions and non ascii characters
+PIECES = [b"the", b"a", b"is", b"ne", b"le", b"good", b"baaaad", b"cooool", b"yes!!!", b"@user", b"@", b"@_x",
+          b"http://t.co/x", b"https", b"http", b"#happy", b"##", b"don't", b"l'ami", b"wait...", b"(ok)", b"1000",
+          b"a_b", b"x-y", b"$5", b":)", b":-(", "été".encode(), "£".encode(), "¨".encode(),
+          b"HeLLLo", b"\t", b"\n", b"", b"!!??", b"aa", b"zzz"]
+EXAMPLES = [b"@user I LOVE this sooooo much!!! #happy http://t.co/abc",
+            b"the  movie is   baaaad... :(",
+            b"ne le fais pas, c'est nul",
+            b"  @ # http ",
+            b"",
+            "café à 5£ !".encode()]
+
+
+def _baseline_clean_element(element, stop_words):
+    # cleaning of an element before the precompiled rules, kept as the reference
+    element = element.lower()
+    if match(rb'@\w+', element) or match(rb'http.+', element):
+        return None
+    element = sub(rb'#', rb'', element)
+    element = sub(rb'[%s]+' % escape("""~"'([-|`\\_^@)]=}/*-+.$£¨*!:/;,? """.encode()), rb'', element)
+    element = sub(rb'(\w)\1+', rb'\1\1', element)
+    if element in stop_words:
+        return None
+    return element
+
+
+def _baseline_clean_text(text, stop_words):
+    list_cleaned_element = list()
+    for element in text.split(rb" "):
+        cleaned_element = _baseline_clean_element(element, stop_words)
+        if cleaned_element:
+            list_cleaned_element.append(cleaned_element)
+    return list_cleaned_element
+
+
+def _random_texts(nb, seed=0):
+    generator = default_rng(seed)
+    return [b" ".join(PIECES[index] for index in generator.integers(0, len(PIECES), generator.integers(0, 12)))
+            for _ in range(nb)]
+
+
+def test_clean_text_matches_baseline_on_examples():
+    for text in EXAMPLES:
+        assert clean_text(text, STOP_WORDS) == _baseline_clean_text(text, STOP_WORDS)
+        assert clean_text(text, list(STOP_WORDS)) == _baseline_clean_text(text, list(STOP_WORDS))
+
+
+def test_clean_text_matches_baseline_on_random_texts():
+    for text in _random_texts(5000):
+        assert clean_text(text, STOP_WORDS) == _baseline_clean_text(text, STOP_WORDS), text
+
+
+def test_clean_texts_matches_clean_text():
+    l_text = _random_texts(200, seed=1)
+    assert clean_texts(l_text, STOP_WORDS) == [_baseline_clean_text(text, STOP_WORDS) for text in l_text]
@@ -0,0 +1,59 @@
+from numpy import unique, vstack
+from numpy.random import default_rng
+from pytest import raises
+
+from Classifier.Kernel import Kernel
+from Classifier.SVM import SVM
+from Classifier.evaluation import score_classifier
+from Classifier.reduction import _reduce, random_fourier_classifier, reduce_support_vectors
+
+
+def _fitted(kernel):
+    generator = default_rng(0)
+    features, labels = generator.integers(0, 3, (80, 5)).astype(float), generator.integers(0, 2, 80).astype(float)
+    Classifier = SVM(kernel, C=1.0)
+    Classifier.fit(features, labels)
+    return Classifier, features, labels
+
+
+def test_reduce_gaussian_profile():
+    Classifier, features, labels = _fitted(Kernel.gaussian())
+    Reduced, report = reduce_support_vectors(Classifier, features, labels, target=5)
+    assert len(Reduced.support_vectors) <= 5
+    assert report["support_vectors"] == len(Classifier.support_vectors)
+
+
+def test_reduce_within_tolerance():
+    # a learnable sample : the smo solver uses the labels 0 | 1 as -1 | +1
+    generator = default_rng(0)
+    features = generator.poisson(1.0, (300, 5)).astype(float)
+    labels = (features[:, 0] + features[:, 2] - features[:, 1] - features[:, 3] + generator.normal(0, 0.7, 300) > 0)
+    labels = labels.astype(float)
+    for kernel in [Kernel.gaussian(), Kernel.radial_basis()]:
+        Classifier = SVM(kernel, C=1.0, solver="smo")
+        Classifier.fit(features, labels)
+        Reduced, report = reduce_support_vectors(Classifier, features, labels, tolerance=1.0)
+        assert report["delta"] >= -1.0
+        assert report["reduced_performance"] == score_classifier(Reduced, features, labels, 0.25)
+        assert report["reduced_support_vectors"] < report["support_vectors"]
+        # no smaller number of support vectors respects the tolerance
+        points = unique(vstack((Classifier.support_vectors, features)), axis=0)
+        for target in range(1, report["reduced_support_vectors"]):
+            assert report["performance"] - score_classifier(_reduce(Classifier, target, points), features, labels,
+                                                            0.25) > 1.0
+
+
+def test_reduce_refuses_other_kernels():
+    for kernel in [Kernel.linear(), Kernel.poly_kernel()]:
+        Classifier, features, labels = _fitted(kernel)
+        with raises(ValueError, match=kernel.name):
+            reduce_support_vectors(Classifier, features, labels)
+        with raises(ValueError, match=kernel.name):
+            random_fourier_classifier(Classifier)
+
+
+def test_reduce_refuses_profiles_without_support_vectors():
+    Classifier, features, labels = _fitted(Kernel.gaussian())
+    Approximated = random_fourier_classifier(Classifier, 100, seed=0)
+    with raises(ValueError, match="support vectors"):
+        reduce_support_vectors(Approximated, features, labels)
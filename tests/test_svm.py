@@ -0,0 +1,148 @@
+from cvxopt import matrix
+from cvxopt.solvers import qp
+from numpy import (abs as absolute, diag, exp, hstack, identity, inner, ones, outer, ravel, repeat, sign, sqrt,
+                   subtract, vstack, where, zeros)
+from numpy.linalg import norm
+from numpy.random import default_rng
+from numpy.testing import assert_allclose
+from pytest import raises
+
+from Classifier.Kernel import Kernel, gram_matrix
+from Classifier.SVM import SVM, group_identical_vectors
+
+KERNEL_NAMES = ["linear", "poly_kernel", "gaussian", "radial_basis"]
+# kernels of the original implementation, evaluated on one pair of vectors at a time
+LOOP_KERNELS = {"linear": lambda x, y: inner(x, y),
+                "poly_kernel": lambda x, y: (1.0 + inner(x, y)) ** 3,
+                "gaussian": lambda x, y: exp(-sqrt(norm(x - y) ** 2 / (2 * 5.0 ** 2))),
+                "radial_basis": lambda x, y: exp(-10 * norm(subtract(x, y)))}
+
+
+def _sample(seed, n_samples):
+    """
+    Random characteristic vectors (small counts, many identical vectors) and labels 0 | 1, like the data set
+    """
+    generator = default_rng(seed)
+    return generator.integers(0, 3, (n_samples, 5)).astype(float), generator.integers(0, 2, n_samples).astype(float)
+
+
+def _loop_gram(name, features):
+    """
+    Gram matrix computed with the double loop of the original implementation
+    """
+    n_samples = len(features)
+    K = zeros((n_samples, n_samples))
+    for i in range(n_samples):
+        for j in range(n_samples):
+            K[i, j] = LOOP_KERNELS[name](features[i], features[j])
+    return K
+
+
+def _loop_multipliers(P, labels, C=None, iterations=16):
+    """
+    Lagrange multipliers solving the quadratic problem built like the original implementation
+    """
+    n_samples = len(labels)
+    if C is None:
+        G, h = matrix(diag(ones(n_samples) * -1)), matrix(zeros(n_samples))
+    else:
+        G = matrix(vstack((diag(ones(n_samples) * -1), identity(n_samples))))
+        h = matrix(hstack((zeros(n_samples), ones(n_samples) * C)))
+    solution = qp(matrix(P), matrix(ones(n_samples) * -1), G, h, matrix(labels, (1, n_samples)), matrix(0.0),
+                  options={'maxiters': iterations, 'show_progress': False})['x']
+    return ravel(solution)
+
+
+def _dual_by_vector(Classifier):
+    """
+    Sum of the lagrange multipliers of each distinct (support vector, label) pair
+    """
+    dual = dict()
+    for vector, label, multiplier in zip(Classifier.support_vectors, Classifier.support_vectors_labels,
+                                         Classifier.lagrange_multipliers):
+        key = tuple(vector) + (label,)
+        dual[key] = dual.get(key, 0.0) + multiplier
+    return dual
+
+
+def test_hard_margin_fit_is_not_grouped():
+    # grouping the vectors of this sample made the hard margin problem fail with a cvxopt 'domain error'
+    features, labels = _sample(0, 60)
+    default, ungrouped = SVM(Kernel.poly_kernel()), SVM(Kernel.poly_kernel())
+    default.fit(features, labels)
+    ungrouped.fit(features, labels, deduplicate=False)
+    assert_allclose(default.lagrange_multipliers, ungrouped.lagrange_multipliers)
+    assert_allclose(default.bias, ungrouped.bias)
+
+
+def test_hard_margin_fit_repeats_grouped_vectors():
+    features, labels = _sample(0, 60)
+    distinct, labels_distinct, multiplicity = group_identical_vectors(features, labels)
+    grouped, repeated = SVM(Kernel.poly_kernel()), SVM(Kernel.poly_kernel())
+    grouped.fit(distinct, labels_distinct, multiplicity=multiplicity)
+    repeated.fit(repeat(distinct, multiplicity, axis=0), repeat(labels_distinct, multiplicity), deduplicate=False)
+    assert_allclose(grouped.lagrange_multipliers, repeated.lagrange_multipliers)
+    assert_allclose(grouped.bias, repeated.bias)
+
+
+def test_soft_margin_grouped_dual_matches_ungrouped():
+    features, labels = _sample(1, 120)
+    for name in KERNEL_NAMES:
+        grouped, ungrouped = SVM(Kernel.get_correct_kernel(name), C=1.0), SVM(Kernel.get_correct_kernel(name), C=1.0)
+        grouped.fit(features, labels, iterations=100)
+        ungrouped.fit(features, labels, iterations=100, deduplicate=False)
+        assert_allclose(grouped.decision_function(features), ungrouped.decision_function(features), atol=1e-4)
+        if name != "linear":
+            dual_grouped, dual_ungrouped = _dual_by_vector(grouped), _dual_by_vector(ungrouped)
+            for key in set(dual_grouped) | set(dual_ungrouped):
+                assert_allclose(dual_grouped.get(key, 0.0), dual_ungrouped.get(key, 0.0), atol=1e-4)
+
+
+def test_vectorized_fit_matches_loop():
+    features, labels = _sample(2, 50)
+    for name in KERNEL_NAMES:
+        kernel = Kernel.get_correct_kernel(name)
+        K = _loop_gram(name, features)
+        P = outer(labels, labels) * K
+        assert_allclose(outer(labels, labels) * gram_matrix(kernel, features), P, rtol=1e-12, atol=1e-12)
+
+        for C in [None, 1.0]:
+            multipliers = _loop_multipliers(P, labels, C)
+            support_vectors = multipliers > 1e-5
+            dual_coefficients = multipliers[support_vectors] * labels[support_vectors]
+            bias = (labels[support_vectors] - K[support_vectors][:, support_vectors].dot(dual_coefficients)).mean()
+
+            Classifier = SVM(kernel, C)
+            Classifier.fit(features, labels, deduplicate=False)
+            assert_allclose(Classifier.bias, bias, rtol=1e-6, atol=1e-8)
+            if name == "linear":
+                assert_allclose(Classifier.weights, dual_coefficients.dot(features[support_vectors]), rtol=1e-6,
+                                atol=1e-8)
+            else:
+                assert_allclose(Classifier.lagrange_multipliers, multipliers[support_vectors], rtol=1e-6, atol=1e-8)
+                assert_allclose(Classifier.support_vectors, features[support_vectors])
+
+
+def test_smo_matches_cvxopt():
+    # a learnable sample with labels -1 | +1
+    generator = default_rng(3)
+    features = generator.poisson(1.0, (200, 5)).astype(float)
+    noise = generator.normal(0, 0.7, 200)
+    labels = where(features[:, 0] + features[:, 2] - features[:, 1] - features[:, 3] + noise > 0, 1.0, -1.0)
+    for name in ["linear", "gaussian", "radial_basis"]:
+        for C in [1.0, 10.0]:
+            reference, Classifier = SVM(Kernel.get_correct_kernel(name), C), SVM(Kernel.get_correct_kernel(name), C,
+                                                                                  "smo")
+            reference.fit(features, labels)
+            Classifier.fit(features, labels)
+            expected, decision = reference.decision_function(features), Classifier.decision_function(features)
+            # within the 'Neutral' threshold : the cvxopt bias is averaged over all the support vectors, the smo bias
+            # over the free ones
+            assert_allclose(decision, expected, atol=0.25)
+            assert (sign(decision) == sign(expected))[absolute(expected) > 0.25].all()
+
+
+def test_smo_refuses_poly_kernel():
+    features, labels = _sample(0, 20)
+    with raises(ValueError, match="poly_kernel"):
+        SVM(Kernel.poly_kernel(), 1.0, "smo").fit(features, labels)